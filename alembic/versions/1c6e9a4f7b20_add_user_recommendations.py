@@ -0,0 +1,34 @@
+"""add user recommendations
+
+Revision ID: 1c6e9a4f7b20
+Revises: f3a7c9d2e815
+Create Date: 2026-10-18 15:02:37.218461
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '1c6e9a4f7b20'
+down_revision = 'f3a7c9d2e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_recommendations',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'rank')
+    )
+    # run scripts/build_user_recommendations.py afterwards to fill it
+
+
+def downgrade() -> None:
+    op.drop_table('user_recommendations')
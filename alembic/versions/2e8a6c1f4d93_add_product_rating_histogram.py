@@ -0,0 +1,39 @@
+"""add product rating histogram
+
+Revision ID: 2e8a6c1f4d93
+Revises: 7d3b5e2a9c41
+Create Date: 2026-10-18 16:20:44.381925
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '2e8a6c1f4d93'
+down_revision = '7d3b5e2a9c41'
+branch_labels = None
+depends_on = None
+
+STARS = range(1, 6)
+
+
+def upgrade() -> None:
+    for stars in STARS:
+        op.add_column('products', sa.Column(f'rating_count_{stars}', sa.Integer(), server_default='0', nullable=False))
+    # one pass over product_ratings; from here on ratings maintain the columns themselves
+    op.execute(
+        "UPDATE products SET "
+        + ", ".join(f"rating_count_{stars} = totals.stars_{stars}" for stars in STARS)
+        + " FROM (SELECT product_id, "
+        + ", ".join(f"SUM(CASE WHEN rating = {stars} THEN 1 ELSE 0 END) AS stars_{stars}" for stars in STARS)
+        + " FROM product_ratings GROUP BY product_id) AS totals"
+        + " WHERE products.id = totals.product_id"
+    )
+
+
+def downgrade() -> None:
+    for stars in reversed(STARS):
+        op.drop_column('products', f'rating_count_{stars}')
@@ -0,0 +1,35 @@
+"""add order_items category_id
+
+Revision ID: 5a2d8e1c7f46
+Revises: 9b1f4d7e3a62
+Create Date: 2026-10-18 19:12:40.318522
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '5a2d8e1c7f46'
+down_revision = '9b1f4d7e3a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('order_items', sa.Column('category_id', sa.Integer(), nullable=True))
+    # the rollups so far credited each line to its product's category; delivery stamps it from here on
+    op.execute(
+        """
+        UPDATE order_items
+        SET category_id = products.category_id
+        FROM products
+        WHERE products.id = order_items.product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('order_items', 'category_id')
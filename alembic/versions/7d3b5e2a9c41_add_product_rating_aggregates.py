@@ -0,0 +1,43 @@
+"""add product rating aggregates
+
+Revision ID: 7d3b5e2a9c41
+Revises: 1c6e9a4f7b20
+Create Date: 2026-10-18 15:48:12.604390
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '7d3b5e2a9c41'
+down_revision = '1c6e9a4f7b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    # one pass over product_ratings; from here on ratings maintain the columns themselves
+    op.execute(
+        """
+        UPDATE products
+        SET rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count,
+            rating = CAST(totals.rating_sum AS FLOAT) / totals.rating_count
+        FROM (
+            SELECT product_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+            FROM product_ratings
+            GROUP BY product_id
+        ) AS totals
+        WHERE products.id = totals.product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'rating_count')
+    op.drop_column('products', 'rating_sum')
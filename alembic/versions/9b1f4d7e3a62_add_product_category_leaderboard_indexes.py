@@ -0,0 +1,38 @@
+"""add product category leaderboard indexes
+
+Revision ID: 9b1f4d7e3a62
+Revises: 2e8a6c1f4d93
+Create Date: 2026-10-18 17:05:19.742308
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '9b1f4d7e3a62'
+down_revision = '2e8a6c1f4d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_products_category_views_count_desc_id',
+        'products',
+        ['category_id', sa.text('views_count DESC'), 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_products_category_sold_count_desc_id',
+        'products',
+        ['category_id', sa.text('sold_count DESC'), 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category_sold_count_desc_id', table_name='products')
+    op.drop_index('ix_products_category_views_count_desc_id', table_name='products')
@@ -0,0 +1,41 @@
+"""add daily sales rollups
+
+Revision ID: b8c4f2e61d07
+Revises: 5d2e8f7a9b14
+Create Date: 2026-10-18 13:41:06.502817
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'b8c4f2e61d07'
+down_revision = '5d2e8f7a9b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_product_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_table('daily_category_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'category_id')
+    )
+    # run scripts/backfill_sales_rollups.py afterwards to fold in existing deliveries
+
+
+def downgrade() -> None:
+    op.drop_table('daily_category_sales')
+    op.drop_table('daily_product_sales')
@@ -0,0 +1,28 @@
+"""add product keyset indexes
+
+Revision ID: c3d81f5a2b7e
+Revises: 6ae3c0a09f99
+Create Date: 2026-10-18 09:12:40.218304
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'c3d81f5a2b7e'
+down_revision = '6ae3c0a09f99'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_created_at_id', table_name='products')
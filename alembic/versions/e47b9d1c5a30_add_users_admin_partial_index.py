@@ -0,0 +1,33 @@
+"""add users admin partial index
+
+Revision ID: e47b9d1c5a30
+Revises: a91e6c04d2f8
+Create Date: 2026-10-18 11:02:17.530219
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'e47b9d1c5a30'
+down_revision = 'a91e6c04d2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_users_admin_id',
+        'users',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('is_admin'),
+        sqlite_where=sa.text('is_admin'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_admin_id', table_name='users')
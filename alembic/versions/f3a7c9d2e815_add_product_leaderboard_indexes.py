@@ -0,0 +1,28 @@
+"""add product leaderboard indexes
+
+Revision ID: f3a7c9d2e815
+Revises: b8c4f2e61d07
+Create Date: 2026-10-18 14:25:51.904117
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'f3a7c9d2e815'
+down_revision = 'b8c4f2e61d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_views_count_desc_id', 'products', [sa.text('views_count DESC'), 'id'], unique=False)
+    op.create_index('ix_products_sold_count_desc_id', 'products', [sa.text('sold_count DESC'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_sold_count_desc_id', table_name='products')
+    op.drop_index('ix_products_views_count_desc_id', table_name='products')
@@ -29,6 +29,59 @@ class Settings(BaseSettings):
     cors_allow_headers: list[str] = Field(default_factory=lambda: ["*"])
     public_base_url: str = "https://bek85.me"
 
+    # buffered products.views_count writes (see app/services/view_counter.py)
+    view_flush_interval_seconds: float = 5.0
+    view_flush_max_events: int = 500
+
+    # product listing/count response cache (see app/services/product.py)
+    catalog_cache_ttl_seconds: float = 30.0
+    catalog_cache_max_entries: int = 1024
+    product_payload_cache_max_entries: int = 10_000
+    # lower bounds of the /products/facets price buckets (UZS), last bucket is open-ended
+    facet_price_edges: list[float] = Field(default_factory=lambda: [0, 100_000, 200_000, 300_000, 500_000, 1_000_000])
+
+    # rows per transaction in POST /products/bulk-import
+    product_import_chunk_size: int = 1000
+
+    # Cache-Control on public catalog GET routes (see app/utils/http_cache.py)
+    http_cache_max_age_seconds: int = 30
+    http_cache_stale_while_revalidate_seconds: int = 300
+
+    # /recommendations/most-viewed|most-sold boards (see app/services/leaderboard.py)
+    leaderboard_size: int = 100
+    leaderboard_refresh_seconds: float = 60.0
+
+    # "bought together" index built by scripts/build_bought_together.py
+    bought_together_index_path: str = "data/bought_together.npz"
+    bought_together_top_k: int = 50
+    bought_together_reload_seconds: float = 30.0
+
+    # TF-IDF "similar products" index built by scripts/build_similar_products.py
+    similar_products_index_dir: str = "data/similar"
+    similar_products_top_k: int = 20
+    # vectors are sparse, so by default every token is kept; set to cap the vocabulary by document frequency
+    similar_products_max_features: int | None = None
+    similar_products_reload_seconds: float = 30.0
+
+    # /recommendations/for-me, built by scripts/build_user_recommendations.py
+    user_recommendations_top_n: int = 50
+    user_recommendations_neighbors: int = 50
+    # ratings at or above count as liking a product; lower ones are only excluded
+    user_recommendations_min_rating: int = 4
+    user_recommendations_cache_ttl_seconds: float = 300.0
+    user_recommendations_cache_max_entries: int = 10_000
+
+    # /recommendations/trending (see app/services/trending.py); a sale counts per unit
+    trending_size: int = 100
+    trending_view_weight: float = 1.0
+    trending_sale_weight: float = 10.0
+    # set to keep trending scores across restarts
+    trending_snapshot_path: Optional[str] = None
+
+    # stored responses for Idempotency-Key retries (see app/utils/idempotency.py)
+    idempotency_ttl_seconds: float = 24 * 3600
+    idempotency_max_entries: int = 10_000
+
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
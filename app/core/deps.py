@@ -9,6 +9,8 @@ from app.repositories.user import UserRepository
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# same scheme, but a missing Authorization header yields None instead of a 401
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
 def get_db() -> Session:
@@ -43,6 +45,16 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return user
 
 
+def get_current_user_optional(
+    token: str | None = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """The authenticated user, or None for anonymous requests; a bad token is still a 401."""
+    if token is None:
+        return None
+    return get_current_user(token, db)
+
+
 def require_admin(current_user=Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
@@ -0,0 +1,15 @@
+from typing import Sequence
+
+from sqlalchemy import column, values
+from sqlalchemy.sql.selectable import CTE
+from sqlalchemy.types import TypeEngine
+
+
+def values_cte(name: str, columns: dict[str, TypeEngine], rows: Sequence[tuple]) -> CTE:
+    """Inline ``VALUES`` list usable as the FROM source of a bulk UPDATE.
+
+    Rendered as ``WITH name(col, ...) AS (VALUES ...)`` so the same statement runs on
+    Postgres and SQLite (which has no column list on a VALUES alias).
+    """
+    source = values(*(column(key, type_) for key, type_ in columns.items()), name=name)
+    return source.data(list(rows)).cte(name)
@@ -1,12 +1,16 @@
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import get_settings
 from app.routers import (
+    analytics,
     auth,
     categories,
     orders,
@@ -18,6 +22,8 @@ from app.routers import (
     chat_messages,     # ✅ yangi (REST chat + DB)
     product_feedback
 )
+from app.services.trending import trending
+from app.services.view_counter import view_counter
 
 settings = get_settings()
 
@@ -28,7 +34,17 @@ if settings.sentry_dsn:
         traces_sample_rate=settings.sentry_traces_sample_rate,
     )
 
-app = FastAPI(title="Afruza Collection API")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await run_in_threadpool(trending.load)
+    view_counter.start()
+    yield
+    await run_in_threadpool(view_counter.stop)
+    await run_in_threadpool(trending.save)
+
+
+app = FastAPI(title="Afruza Collection API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +65,7 @@ app.include_router(chat.router)           # websocket
 app.include_router(chat_messages.router) # ✅ REST chat
 app.include_router(notifications.router) # ✅ notifications
 app.include_router(product_feedback.router)
+app.include_router(analytics.router)
 
 
 # Media static files
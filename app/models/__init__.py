@@ -5,6 +5,8 @@ from app.models.user import User
 from app.models.notification import Notification
 from app.models.chat_message import ChatMessage
 from app.models.product_feedback import ProductRating, ProductComment
+from app.models.analytics import DailyCategorySales, DailyProductSales
+from app.models.recommendation import UserRecommendation
 
 __all__ = [
     "User",
@@ -18,4 +20,7 @@ __all__ = [
     "ChatMessage",
     "ProductRating",
     "ProductComment",
+    "DailyProductSales",
+    "DailyCategorySales",
+    "UserRecommendation",
 ]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import Date, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DailyProductSales(Base):
+    """Units and revenue per product per order day, counted when an order is delivered.
+
+    Ids are plain columns, not foreign keys, so history survives product deletion.
+    """
+
+    __tablename__ = "daily_product_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+
+
+class DailyCategorySales(Base):
+    """Units and revenue per category per order day (category of the product at delivery)."""
+
+    __tablename__ = "daily_category_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
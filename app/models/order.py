@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import DateTime, Enum as SqlEnum, ForeignKey, Integer, Numeric, Float, String
+from sqlalchemy import DateTime, Enum as SqlEnum, ForeignKey, Index, Integer, Numeric, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from app.db.base import Base
@@ -18,6 +18,11 @@ class OrderStatus(str, Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # order history is listed newest first, per user and for admins
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -38,12 +43,14 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
     product_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("products.id", ondelete="SET NULL"),
         nullable=True
     )
     variant_id: Mapped[int | None] = mapped_column(ForeignKey("product_variants.id"), nullable=True)
+    # category the sales rollups credited when the order was delivered; a plain column like the rollup ids
+    category_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     quantity: Mapped[int] = mapped_column(Integer)
     unit_price: Mapped[float] = mapped_column(Numeric(10, 2))
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, Numeric, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -8,12 +8,26 @@ from app.db.base import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset pagination keys (see ProductRepository.SORT_KEYS)
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200), index=True)
     description: Mapped[str] = mapped_column(String(1000))
     price: Mapped[float] = mapped_column(Numeric(10, 2))
     rating: Mapped[float] = mapped_column(Float, default=0)
+    # kept in step with product_ratings by ProductFeedbackRepository; rating = sum / count
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # star histogram: how many of rating_count are 1..5 stars
+    rating_count_1: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count_2: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count_3: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count_4: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    rating_count_5: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
     views_count: Mapped[int] = mapped_column(Integer, default=0)
     sold_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -33,6 +47,13 @@ class Product(Base):
     stock_count: Mapped[int] = mapped_column(Integer, default=0)
 
 
+# leaderboard scans (see app/services/leaderboard.py), highest first
+Index("ix_products_views_count_desc_id", Product.views_count.desc(), Product.id)
+Index("ix_products_sold_count_desc_id", Product.sold_count.desc(), Product.id)
+Index("ix_products_category_views_count_desc_id", Product.category_id, Product.views_count.desc(), Product.id)
+Index("ix_products_category_sold_count_desc_id", Product.category_id, Product.sold_count.desc(), Product.id)
+
+
 class ProductImage(Base):
     __tablename__ = "product_images"
 
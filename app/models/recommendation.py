@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserRecommendation(Base):
+    """Top-N products per user, written by scripts/build_user_recommendations.py.
+
+    ``product_id`` is a plain column: the table is replaced wholesale on every build and
+    deleted products are dropped when the payloads are loaded.
+    """
+
+    __tablename__ = "user_recommendations"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer)
+    score: Mapped[float] = mapped_column(Float)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import Date, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.analytics import DailyCategorySales, DailyProductSales
+from app.models.category import Category
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+
+
+class AnalyticsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _insert(self, model):
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
+    def _upsert(self, model, key: str, source) -> None:
+        # INSERT ... SELECT ... ON CONFLICT (day, key) DO UPDATE adds to existing rows
+        stmt = self._insert(model).from_select(["day", key, "units", "revenue"], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", key],
+            set_={
+                "units": model.units + stmt.excluded.units,
+                "revenue": model.revenue + stmt.excluded.revenue,
+            },
+        )
+        self.db.execute(stmt)
+
+    def _add(self, condition: ColumnElement[bool], sign: int = 1) -> None:
+        day = func.date(Order.created_at, type_=Date).label("day")
+        units = (sign * func.sum(OrderItem.quantity)).label("units")
+        revenue = (sign * func.sum(OrderItem.quantity * OrderItem.unit_price)).label("revenue")
+        lines = (
+            select()
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(condition, OrderItem.product_id.is_not(None))
+        )
+        self._upsert(
+            DailyProductSales,
+            "product_id",
+            lines.add_columns(day, OrderItem.product_id, units, revenue).group_by(day, OrderItem.product_id),
+        )
+        # the category stamped at delivery; lines from before it was recorded fall back to the product's
+        category_id = func.coalesce(OrderItem.category_id, Product.category_id).label("category_id")
+        self._upsert(
+            DailyCategorySales,
+            "category_id",
+            lines.outerjoin(Product, Product.id == OrderItem.product_id)
+            .where(category_id.is_not(None))
+            .add_columns(day, category_id, units, revenue)
+            .group_by(day, category_id),
+        )
+
+    def add_orders(self, order_ids: Iterable[int]) -> None:
+        """Fold the lines of ``order_ids`` into the daily rollups, without committing.
+
+        Each line is stamped with its product's current category first, so a later
+        ``subtract_orders`` takes it back out of the category it was credited to.
+        """
+        order_ids = set(order_ids)
+        self.db.execute(
+            update(OrderItem)
+            .where(OrderItem.order_id.in_(order_ids))
+            .values(category_id=select(Product.category_id).where(Product.id == OrderItem.product_id).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+        self._add(Order.id.in_(order_ids))
+
+    def subtract_orders(self, order_ids: Iterable[int]) -> None:
+        """Take the lines of ``order_ids`` back out of the daily rollups, without committing.
+
+        Category rows are debited by the category stamped at delivery, not the product's
+        current one. Rows that drop to zero are deleted, so the tables match what
+        ``rebuild`` produces.
+        """
+        order_ids = set(order_ids)
+        self._add(Order.id.in_(order_ids), sign=-1)
+        days = select(func.date(Order.created_at, type_=Date)).where(Order.id.in_(order_ids))
+        for model in (DailyProductSales, DailyCategorySales):
+            self.db.execute(delete(model).where(model.day.in_(days), model.units == 0, model.revenue == 0))
+
+    def rebuild(self, statuses: Iterable[OrderStatus]) -> None:
+        """Recompute both rollups from every order in ``statuses``, without committing."""
+        self.db.execute(delete(DailyProductSales))
+        self.db.execute(delete(DailyCategorySales))
+        self._add(Order.status.in_(list(statuses)))
+
+    def sales_by_day(self, date_from: date, date_to: date) -> list[Row]:
+        stmt = (
+            select(
+                DailyCategorySales.day,
+                func.sum(DailyCategorySales.units).label("units"),
+                func.sum(DailyCategorySales.revenue).label("revenue"),
+            )
+            .where(DailyCategorySales.day.between(date_from, date_to))
+            .group_by(DailyCategorySales.day)
+            .order_by(DailyCategorySales.day)
+        )
+        return list(self.db.execute(stmt).all())
+
+    def sales_by_category(self, date_from: date, date_to: date, limit: int) -> list[Row]:
+        totals = (
+            select(
+                DailyCategorySales.category_id,
+                func.sum(DailyCategorySales.units).label("units"),
+                func.sum(DailyCategorySales.revenue).label("revenue"),
+            )
+            .where(DailyCategorySales.day.between(date_from, date_to))
+            .group_by(DailyCategorySales.category_id)
+            .subquery()
+        )
+        stmt = (
+            select(totals.c.category_id, Category.name.label("category_name"), totals.c.units, totals.c.revenue)
+            .outerjoin(Category, Category.id == totals.c.category_id)
+            .order_by(totals.c.revenue.desc(), totals.c.category_id)
+            .limit(limit)
+        )
+        return list(self.db.execute(stmt).all())
+
+    def sales_by_product(self, date_from: date, date_to: date, limit: int) -> list[Row]:
+        totals = (
+            select(
+                DailyProductSales.product_id,
+                func.sum(DailyProductSales.units).label("units"),
+                func.sum(DailyProductSales.revenue).label("revenue"),
+            )
+            .where(DailyProductSales.day.between(date_from, date_to))
+            .group_by(DailyProductSales.product_id)
+            .subquery()
+        )
+        stmt = (
+            select(totals.c.product_id, Product.name.label("product_name"), totals.c.units, totals.c.revenue)
+            .outerjoin(Product, Product.id == totals.c.product_id)
+            .order_by(totals.c.revenue.desc(), totals.c.product_id)
+            .limit(limit)
+        )
+        return list(self.db.execute(stmt).all())
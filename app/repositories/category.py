@@ -1,7 +1,10 @@
+from __future__ import annotations
+
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models.category import Category
+from app.repositories.paging import TotalMode, fetch_page
 
 
 class CategoryRepository:
@@ -12,6 +15,22 @@ class CategoryRepository:
         stmt = select(Category).offset(skip).limit(limit)
         return list(self.db.scalars(stmt).all())
 
+    def list_page(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Category], int | None, bool]:
+        stmt = select(Category).order_by(Category.id)
+        return fetch_page(
+            self.db,
+            stmt,
+            skip,
+            limit,
+            total_mode=total_mode,
+            estimate_table=Category.__tablename__,
+        )
+
     def count(self) -> int:
         stmt = select(func.count()).select_from(Category)
         return int(self.db.scalar(stmt) or 0)
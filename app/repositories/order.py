@@ -1,48 +1,152 @@
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, selectinload
+from typing import Any, Iterable, Sequence
 
-from app.models.order import Order, OrderItem
-from app.models.product import Product
+from sqlalchemy import Select, func, literal, select, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductImage
+from app.repositories.paging import TotalMode, fetch_page
 
 
 class OrderRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def list_all(self, skip: int = 0, limit: int = 50) -> list[Order]:
-        stmt = select(Order).options(
+    @staticmethod
+    def _with_items(stmt):
+        return stmt.options(
             selectinload(Order.items)
             .selectinload(OrderItem.product)
             .selectinload(Product.images),
             selectinload(Order.items)
             .selectinload(OrderItem.product)
             .selectinload(Product.category),
+            selectinload(Order.items)
+            .selectinload(OrderItem.product)
+            .selectinload(Product.variants),
             selectinload(Order.items).selectinload(OrderItem.variant),
-        ).offset(skip).limit(limit)
+        )
+
+    @staticmethod
+    def _newest_first(stmt: Select, after: Sequence[Any] | None = None) -> Select:
+        # (created_at, id) DESC walks ix_orders_user_id_created_at_id / ix_orders_created_at_id
+        # backwards; ``after`` is the (created_at, id) of the last row of the previous page
+        if after is not None:
+            created_at, order_id = after
+            stmt = stmt.where(
+                tuple_(Order.created_at, Order.id)
+                < tuple_(literal(created_at, Order.created_at.type), literal(order_id, Order.id.type))
+            )
+        return stmt.order_by(Order.created_at.desc(), Order.id.desc())
+
+    @classmethod
+    def _summary_stmt(cls, user_id: int | None = None, after: Sequence[Any] | None = None) -> Select:
+        """One query per page, no ORM graph: totals, line counts and the thumbnail (first
+        image of the first line) are correlated subqueries over ix_order_items_order_id,
+        so only the rows of the page are aggregated, not every order before the LIMIT."""
+        line = aliased(OrderItem)
+        total = (
+            select(func.coalesce(func.sum(line.quantity * line.unit_price), 0))
+            .where(line.order_id == Order.id)
+            .scalar_subquery()
+        )
+        item_count = select(func.count(line.id)).where(line.order_id == Order.id).scalar_subquery()
+        thumbnail = (
+            select(ProductImage.url)
+            .join(line, line.product_id == ProductImage.product_id)
+            .where(line.order_id == Order.id)
+            .order_by(line.id, ProductImage.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = select(
+            Order.id,
+            Order.status,
+            Order.delivery_address_text,
+            Order.created_at,
+            total.label("total"),
+            item_count.label("item_count"),
+            thumbnail.label("thumbnail_url"),
+        )
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        return cls._newest_first(stmt, after)
+
+    def list_summaries(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        user_id: int | None = None,
+        after: Sequence[Any] | None = None,
+    ) -> list[Row]:
+        stmt = self._summary_stmt(user_id, after).offset(skip).limit(limit)
+        return list(self.db.execute(stmt).all())
+
+    def list_summaries_page(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        user_id: int | None = None,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Row], int | None, bool]:
+        return fetch_page(
+            self.db,
+            self._summary_stmt(user_id),
+            skip,
+            limit,
+            total_mode=total_mode,
+            estimate_table=Order.__tablename__ if user_id is None else None,
+        )
+
+    def list_all(self, skip: int = 0, limit: int = 50, after: Sequence[Any] | None = None) -> list[Order]:
+        stmt = self._newest_first(self._with_items(select(Order)), after).offset(skip).limit(limit)
         return list(self.db.scalars(stmt).all())
 
+    def list_all_page(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Order], int | None, bool]:
+        stmt = self._newest_first(self._with_items(select(Order)))
+        return fetch_page(
+            self.db,
+            stmt,
+            skip,
+            limit,
+            total_mode=total_mode,
+            estimate_table=Order.__tablename__,
+        )
+
     def count_all(self) -> int:
         stmt = select(func.count()).select_from(Order)
         return int(self.db.scalar(stmt) or 0)
 
-    def list_by_user(self, user_id: int, skip: int = 0, limit: int = 50) -> list[Order]:
+    def list_by_user(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        after: Sequence[Any] | None = None,
+    ) -> list[Order]:
         stmt = (
-            select(Order)
-            .where(Order.user_id == user_id)
-            .options(
-                selectinload(Order.items)
-                .selectinload(OrderItem.product)
-                .selectinload(Product.images),
-                selectinload(Order.items)
-                .selectinload(OrderItem.product)
-                .selectinload(Product.category),
-                selectinload(Order.items).selectinload(OrderItem.variant),
-            )
+            self._newest_first(self._with_items(select(Order).where(Order.user_id == user_id)), after)
             .offset(skip)
             .limit(limit)
         )
         return list(self.db.scalars(stmt).all())
 
+    def list_by_user_page(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Order], int | None, bool]:
+        stmt = self._newest_first(self._with_items(select(Order).where(Order.user_id == user_id)))
+        return fetch_page(self.db, stmt, skip, limit, total_mode=total_mode)
+
     def count_by_user(self, user_id: int) -> int:
         stmt = select(func.count()).select_from(Order).where(Order.user_id == user_id)
         return int(self.db.scalar(stmt) or 0)
@@ -54,23 +158,31 @@ class OrderRepository:
         return order
 
     def get(self, order_id: int) -> Order | None:
+        stmt = self._with_items(select(Order).where(Order.id == order_id))
+        return self.db.scalar(stmt)
+
+    def lock_statuses(self, order_ids: Iterable[int]) -> dict[int, OrderStatus]:
+        """Current status of each existing order, row-locked until the transaction ends."""
         stmt = (
-            select(Order)
-            .where(Order.id == order_id)
-            .options(
-                selectinload(Order.items)
-                .selectinload(OrderItem.product)
-                .selectinload(Product.images),
-                selectinload(Order.items)
-                .selectinload(OrderItem.product)
-                .selectinload(Product.category),
-                selectinload(Order.items).selectinload(OrderItem.variant),
-            )
+            select(Order.id, Order.status)
+            .where(Order.id.in_(set(order_ids)))
+            .order_by(Order.id)
+            .with_for_update()
         )
-        return self.db.scalar(stmt)
+        return {row.id: row.status for row in self.db.execute(stmt)}
+
+    def set_status(self, order_ids: Iterable[int], status: OrderStatus) -> None:
+        """One UPDATE for all ``order_ids``, without committing."""
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(set(order_ids)))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(stmt)
 
     def update(self, order: Order) -> Order:
         self.db.add(order)
         self.db.commit()
         self.db.refresh(order)
-        return order
\ No newline at end of file
+        return order
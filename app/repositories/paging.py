@@ -0,0 +1,77 @@
+from enum import Enum
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
+
+
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
+def fetch_page(
+    db: Session,
+    stmt: Select,
+    skip: int,
+    limit: int,
+    total_mode: TotalMode = TotalMode.exact,
+    estimate_table: str | None = None,
+) -> tuple[list, int | None, bool]:
+    """Run one page of a ``select`` and return ``(items, total, has_more)``.
+
+    Items are entities for a single-entity select and rows for column projections.
+
+    ``exact`` gets the total in the same round trip through ``count(*) OVER ()``.
+    ``estimate`` reads the planner's row estimate from ``pg_class`` and only applies to
+    unfiltered listings (the caller passes ``estimate_table``); otherwise it falls back
+    to ``exact``. ``none`` skips the total and looks one row ahead to find ``has_more``.
+    """
+    if total_mode == TotalMode.estimate:
+        estimate = _estimate_rows(db, estimate_table) if estimate_table else None
+        if estimate is None:
+            total_mode = TotalMode.exact
+        else:
+            items, has_more = _fetch_ahead(db, stmt, skip, limit)
+            # the estimate can lag behind; never report fewer rows than we can see
+            return items, max(estimate, skip + len(items) + int(has_more)), has_more
+
+    if total_mode == TotalMode.none:
+        items, has_more = _fetch_ahead(db, stmt, skip, limit)
+        return items, None, has_more
+
+    windowed = stmt.add_columns(func.count().over().label("total_count")).offset(skip).limit(limit)
+    rows = db.execute(windowed).all()
+    # projection rows keep the extra total_count column, which serializers ignore
+    items = [row[0] for row in rows] if _single_entity(stmt) else rows
+    if rows:
+        total = int(rows[0].total_count)
+    elif skip == 0:
+        total = 0
+    else:
+        # past the last page the window has no row to ride on
+        total = int(db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0)
+    return items, total, skip + len(items) < total
+
+
+def _single_entity(stmt: Select) -> bool:
+    return len(stmt.column_descriptions) == 1
+
+
+def _fetch_ahead(db: Session, stmt: Select, skip: int, limit: int) -> tuple[list, bool]:
+    result = db.execute(stmt.offset(skip).limit(limit + 1))
+    rows = list(result.scalars().all() if _single_entity(stmt) else result.all())
+    return rows[:limit], len(rows) > limit
+
+
+def _estimate_rows(db: Session, table: str) -> int | None:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    reltuples = db.scalar(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    )
+    # -1 until the table has been vacuumed/analyzed at least once
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
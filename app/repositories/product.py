@@ -1,15 +1,57 @@
-from typing import Sequence
+from __future__ import annotations
 
-from sqlalchemy import func, select
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Sequence
+
+from sqlalchemy import Integer, case, func, literal, literal_column, null, or_, select, tuple_, union_all, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
+from app.db.bulk import values_cte
+from app.models.order import OrderItem
 from app.models.product import Product, ProductImage, ProductVariant
+from app.repositories.paging import TotalMode, fetch_page
+from app.schemas.product import ProductSort
+
+# sort -> (key columns, descending); every key ends with Product.id so the order is total
+SORT_KEYS = {
+    ProductSort.id: ((Product.id,), False),
+    ProductSort.newest: ((Product.created_at, Product.id), True),
+    ProductSort.oldest: ((Product.created_at, Product.id), False),
+    ProductSort.price_asc: ((Product.price, Product.id), False),
+    ProductSort.price_desc: ((Product.price, Product.id), True),
+}
+
+# Postgres-only generated column (see migration a91e6c04d2f8), not mapped on the model
+# so SQLite test databases can still be created from Base.metadata.
+SEARCH_VECTOR = literal_column("products.search_vector")
+SEARCH_CONFIG = "simple"
 
 
 class ProductRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    def _full_text(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _search_clause(self, query: str):
+        if self._full_text():
+            # tsvector match over name+description, trigram similarity on name catches typos
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            return or_(SEARCH_VECTOR.op("@@")(ts_query), Product.name.op("%")(query))
+        pattern = f"%{query}%"
+        return or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+
+    def _search_rank(self, query: str):
+        if self._full_text():
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            return (
+                func.ts_rank(SEARCH_VECTOR, ts_query).desc(),
+                func.similarity(Product.name, query).desc(),
+            )
+        return (case((Product.name.ilike(f"%{query}%"), 0), else_=1),)
+
     def _apply_filters(
         self,
         stmt,
@@ -19,7 +61,7 @@ class ProductRepository:
         price_max: float | None = None,
     ):
         if query:
-            stmt = stmt.where(Product.name.ilike(f"%{query}%"))
+            stmt = stmt.where(self._search_clause(query))
         if category_id:
             stmt = stmt.where(Product.category_id == category_id)
         if price_min is not None:
@@ -28,6 +70,25 @@ class ProductRepository:
             stmt = stmt.where(Product.price <= price_max)
         return stmt
 
+    def _apply_sort(
+        self,
+        stmt,
+        sort: ProductSort,
+        after: Sequence[Any] | None = None,
+        query: str | None = None,
+    ):
+        if sort == ProductSort.relevance:
+            if not query:
+                return stmt.order_by(Product.id)
+            return stmt.order_by(*self._search_rank(query), Product.id)
+        keys, descending = SORT_KEYS[sort]
+        if after is not None:
+            # keyset condition: (key..., id) strictly past the last row of the previous page
+            lhs = tuple_(*keys)
+            rhs = tuple_(*(literal(value, key.type) for key, value in zip(keys, after)))
+            stmt = stmt.where(lhs < rhs if descending else lhs > rhs)
+        return stmt.order_by(*(key.desc() if descending else key.asc() for key in keys))
+
     def list(
         self,
         query: str | None = None,
@@ -36,21 +97,58 @@ class ProductRepository:
         price_max: float | None = None,
         skip: int = 0,
         limit: int = 50,
+        sort: ProductSort = ProductSort.id,
+        after: Sequence[Any] | None = None,
     ) -> list[Product]:
+        stmt = self._listing_stmt(query, category_id, price_min, price_max)
+        stmt = self._apply_sort(stmt, sort, after, query=query)
+        if after is None and skip:
+            stmt = stmt.offset(skip)
+        stmt = stmt.limit(limit)
+        return list(self.db.scalars(stmt).all())
+
+    def list_page(
+        self,
+        query: str | None = None,
+        category_id: int | None = None,
+        price_min: float | None = None,
+        price_max: float | None = None,
+        skip: int = 0,
+        limit: int = 50,
+        sort: ProductSort = ProductSort.id,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Product], int | None, bool]:
+        stmt = self._listing_stmt(query, category_id, price_min, price_max)
+        stmt = self._apply_sort(stmt, sort, query=query)
+        unfiltered = not query and not category_id and price_min is None and price_max is None
+        return fetch_page(
+            self.db,
+            stmt,
+            skip,
+            limit,
+            total_mode=total_mode,
+            estimate_table=Product.__tablename__ if unfiltered else None,
+        )
+
+    def _listing_stmt(
+        self,
+        query: str | None,
+        category_id: int | None,
+        price_min: float | None,
+        price_max: float | None,
+    ):
         stmt = select(Product).options(
             selectinload(Product.images),
             selectinload(Product.category),
             selectinload(Product.variants),
         )
-        stmt = self._apply_filters(
+        return self._apply_filters(
             stmt,
             query=query,
             category_id=category_id,
             price_min=price_min,
             price_max=price_max,
         )
-        stmt = stmt.offset(skip).limit(limit)
-        return list(self.db.scalars(stmt).all())
 
     def count(
         self,
@@ -69,6 +167,70 @@ class ProductRepository:
         )
         return int(self.db.scalar(stmt) or 0)
 
+    def facet_counts(
+        self,
+        price_edges: Sequence[float],
+        query: str | None = None,
+        category_id: int | None = None,
+        price_min: float | None = None,
+        price_max: float | None = None,
+    ) -> list[tuple[str, int | None, int]]:
+        """Return ``(facet, key, count)`` rows for category, price bucket and stock facets.
+
+        ``facet`` is one of "category", "price", "stock" or "total". Price bucket ``i``
+        covers ``[price_edges[i], price_edges[i + 1])``, the last one is open-ended.
+        """
+        bucket = case(
+            *((Product.price < edge, index) for index, edge in enumerate(price_edges[1:])),
+            else_=len(price_edges) - 1,
+        )
+        in_stock = case((Product.stock_count > 0, 1), else_=0)
+        stmt = select(
+            Product.category_id.label("category_id"),
+            bucket.label("price_bucket"),
+            in_stock.label("in_stock"),
+        )
+        stmt = self._apply_filters(
+            stmt,
+            query=query,
+            category_id=category_id,
+            price_min=price_min,
+            price_max=price_max,
+        )
+        filtered = stmt.subquery()
+        facets = {
+            "category": filtered.c.category_id,
+            "price": filtered.c.price_bucket,
+            "stock": filtered.c.in_stock,
+        }
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            # one pass over the filtered rows for all facets
+            grouped = select(
+                *facets.values(),
+                *(func.grouping(column).label(f"g_{name}") for name, column in facets.items()),
+                func.count().label("n"),
+            ).group_by(func.grouping_sets(*(tuple_(column) for column in facets.values()), tuple_()))
+            rows = []
+            for row in self.db.execute(grouped):
+                for name, column in facets.items():
+                    if getattr(row, f"g_{name}") == 0:
+                        rows.append((name, row._mapping[column], int(row.n)))
+                        break
+                else:
+                    rows.append(("total", None, int(row.n)))
+            return rows
+
+        # no GROUPING SETS (SQLite): same result as one UNION ALL statement
+        parts = [
+            select(literal(name).label("facet"), column.label("key"), func.count().label("n")).group_by(column)
+            for name, column in facets.items()
+        ]
+        parts.append(
+            select(literal("total").label("facet"), null().label("key"), func.count().label("n")).select_from(filtered)
+        )
+        return [(facet, key, int(n)) for facet, key, n in self.db.execute(union_all(*parts))]
+
     def get(self, product_id: int) -> Product | None:
         stmt = (
             select(Product)
@@ -81,6 +243,22 @@ class ProductRepository:
         )
         return self.db.scalar(stmt)
 
+    def get_many(self, product_ids: Iterable[int]) -> list[Product]:
+        stmt = (
+            select(Product)
+            .where(Product.id.in_(set(product_ids)))
+            .options(
+                selectinload(Product.images),
+                selectinload(Product.category),
+                selectinload(Product.variants),
+            )
+        )
+        return list(self.db.scalars(stmt).all())
+
+    def exists(self, product_id: int) -> bool:
+        # primary-key lookup only, for callers that never touch the product itself
+        return self.db.scalar(select(Product.id).where(Product.id == product_id)) is not None
+
     def create(self, product: Product) -> Product:
         self.db.add(product)
         self.db.commit()
@@ -120,12 +298,66 @@ class ProductRepository:
     def get_variant(self, variant_id: int) -> ProductVariant | None:
         return self.db.get(ProductVariant, variant_id)
 
-    def increment_views(self, product: Product) -> Product:
-        product.views_count += 1
-        self.db.add(product)
+    def prices_by_id(self, product_ids: Iterable[int]) -> dict[int, Decimal]:
+        # column-only load, no ORM objects or eager relationships
+        stmt = select(Product.id, Product.price).where(Product.id.in_(set(product_ids)))
+        return {row.id: row.price for row in self.db.execute(stmt)}
+
+    def variants_by_id(self, variant_ids: Iterable[int]) -> dict[int, Row]:
+        stmt = select(ProductVariant.id, ProductVariant.product_id, ProductVariant.price).where(
+            ProductVariant.id.in_(set(variant_ids))
+        )
+        return {row.id: row for row in self.db.execute(stmt)}
+
+    def add_views(self, counts: Mapping[int, int]) -> None:
+        # sorted ids keep row lock order stable between concurrent flushes
+        rows = sorted(counts.items())
+        v = values_cte("v", {"id": Integer(), "n": Integer()}, rows)
+        stmt = (
+            update(Product)
+            .where(Product.id == v.c.id)
+            .values(views_count=Product.views_count + v.c.n)
+            .add_cte(v)
+        )
+        self.db.execute(stmt)
         self.db.commit()
-        self.db.refresh(product)
-        return product
+
+    def reserve_stock(self, quantities: Mapping[int, int]) -> set[int]:
+        """Take ``quantities`` out of stock in one conditional UPDATE, without committing.
+
+        Only rows that still have enough stock are decremented; the ids that were
+        returned are the ones reserved. The caller must roll back if any are missing.
+        """
+        rows = sorted(quantities.items())
+        v = values_cte("v", {"id": Integer(), "q": Integer()}, rows)
+        stmt = (
+            update(Product)
+            .where(Product.id == v.c.id, Product.stock_count >= v.c.q)
+            .values(stock_count=Product.stock_count - v.c.q)
+            .add_cte(v)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(self.db.scalars(stmt).all())
+
+    def add_sold_for_orders(self, order_ids: Iterable[int]) -> None:
+        """Add the line quantities of ``order_ids`` to sold_count, without committing.
+
+        One UPDATE ... FROM over the per-product sums, however many orders and lines.
+        """
+        sold = (
+            select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+            .where(OrderItem.order_id.in_(set(order_ids)), OrderItem.product_id.is_not(None))
+            .group_by(OrderItem.product_id)
+            .subquery("sold")
+        )
+        stmt = (
+            update(Product)
+            .where(Product.id == sold.c.product_id)
+            .values(sold_count=Product.sold_count + sold.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(stmt)
 
     def increment_sold(self, product: Product, quantity: int) -> Product:
         product.sold_count += quantity
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import Float, case, cast, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
 from app.models.product import Product
 from app.models.product_feedback import ProductComment, ProductRating
+from app.repositories.paging import TotalMode, fetch_page
+
+STAR_COLUMNS = {
+    1: Product.rating_count_1,
+    2: Product.rating_count_2,
+    3: Product.rating_count_3,
+    4: Product.rating_count_4,
+    5: Product.rating_count_5,
+}
 
 
 class ProductFeedbackRepository:
@@ -21,48 +35,109 @@ class ProductFeedbackRepository:
         )
         return self.db.scalar(stmt)
 
-    def upsert_rating(self, product: Product, user_id: int, rating: int) -> ProductRating:
-        existing = self.get_user_rating(product.id, user_id)
-        if existing:
-            existing.rating = rating
-            self.db.add(existing)
-            self.db.commit()
-            self.db.refresh(existing)
-            self.recalculate_product_rating(product)
-            return existing
-
-        obj = ProductRating(product_id=product.id, user_id=user_id, rating=rating)
-        self.db.add(obj)
+    def user_ratings(self, user_id: int, product_ids: Iterable[int]) -> dict[int, int]:
+        stmt = select(ProductRating.product_id, ProductRating.rating).where(
+            ProductRating.user_id == user_id,
+            ProductRating.product_id.in_(set(product_ids)),
+        )
+        return {row.product_id: row.rating for row in self.db.execute(stmt)}
+
+    def upsert_rating(self, product_id: int, user_id: int, rating: int) -> Row | None:
+        """Insert or change a user's rating and fold the delta into the product's aggregates.
+
+        Returns the new aggregates (as ``rating_stats`` rows), or None if the product does
+        not exist.
+        """
+        if not self._lock_product(product_id):
+            return None
+        # a separate statement, so under READ COMMITTED it sees a rating committed while we waited
+        previous = self.db.scalar(
+            select(ProductRating.rating).where(
+                ProductRating.product_id == product_id,
+                ProductRating.user_id == user_id,
+            )
+        )
+
+        now = datetime.utcnow()
+        stmt = self._insert().values(
+            product_id=product_id, user_id=user_id, rating=rating, created_at=now, updated_at=now
+        )
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["product_id", "user_id"],
+                set_={"rating": stmt.excluded.rating, "updated_at": stmt.excluded.updated_at},
+            )
+        )
+        stats = self._add_to_aggregates(product_id, added=rating, removed=previous)
         self.db.commit()
-        self.db.refresh(obj)
-        self.recalculate_product_rating(product)
-        return obj
+        return stats
 
-    def delete_rating(self, product: Product, user_id: int) -> bool:
-        existing = self.get_user_rating(product.id, user_id)
-        if not existing:
+    def delete_rating(self, product_id: int, user_id: int) -> bool:
+        # same lock as upsert_rating, so a delete and an upsert of one product never interleave
+        if not self._lock_product(product_id):
+            return False
+        previous = self.db.scalar(
+            delete(ProductRating)
+            .where(ProductRating.product_id == product_id, ProductRating.user_id == user_id)
+            .returning(ProductRating.rating)
+        )
+        if previous is None:
+            self.db.rollback()
             return False
-        self.db.delete(existing)
+        self._add_to_aggregates(product_id, added=None, removed=previous)
         self.db.commit()
-        self.recalculate_product_rating(product)
         return True
 
-    def get_rating_stats(self, product_id: int) -> tuple[float, int]:
-        stmt = select(
-            func.coalesce(func.avg(ProductRating.rating), 0.0),
-            func.count(ProductRating.id),
-        ).where(ProductRating.product_id == product_id)
-        avg_, count_ = self.db.execute(stmt).one()
-        return float(avg_ or 0.0), int(count_ or 0)
-
-    def recalculate_product_rating(self, product: Product) -> Product:
-        avg_, _count = self.get_rating_stats(product.id)
-        # Store average in products.rating so list endpoints are fast.
-        product.rating = avg_
-        self.db.add(product)
-        self.db.commit()
-        self.db.refresh(product)
-        return product
+    def get_rating_stats(self, product_id: int) -> Row | None:
+        return self.db.execute(select(*self._stats_columns()).where(Product.id == product_id)).one_or_none()
+
+    def rating_stats(self, product_ids: Iterable[int]) -> list[Row]:
+        """Stored aggregates of the existing products among ``product_ids``, in one query."""
+        stmt = select(*self._stats_columns()).where(Product.id.in_(set(product_ids))).order_by(Product.id)
+        return list(self.db.execute(stmt).all())
+
+    @staticmethod
+    def _stats_columns() -> list:
+        return [Product.id.label("product_id"), Product.rating_sum, Product.rating_count, *STAR_COLUMNS.values()]
+
+    def _lock_product(self, product_id: int) -> bool:
+        """Lock the product row (FOR UPDATE on Postgres); False if it does not exist.
+
+        Every write to a product's rating aggregates takes this lock first, so they apply
+        their deltas one after another. Read the user's previous rating only after it: a
+        row joined into the locking statement is not re-read when the lock is granted.
+        """
+        locked = self.db.scalar(select(Product.id).where(Product.id == product_id).with_for_update())
+        return locked is not None
+
+    def _insert(self):
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(ProductRating)
+
+    def _add_to_aggregates(self, product_id: int, added: int | None, removed: int | None) -> Row:
+        """Count the ``added`` rating in and the ``removed`` one out (either may be None)."""
+        # SET expressions see the row as it was, so the average uses the new sum and count;
+        # products.rating keeps the average for list endpoints and sorting
+        rating_sum = Product.rating_sum + (added or 0) - (removed or 0)
+        rating_count = Product.rating_count + int(added is not None) - int(removed is not None)
+        values = {
+            "rating_sum": rating_sum,
+            "rating_count": rating_count,
+            "rating": case((rating_count > 0, cast(rating_sum, Float) / rating_count), else_=0.0),
+        }
+        if added != removed:
+            if added is not None:
+                values[STAR_COLUMNS[added].key] = STAR_COLUMNS[added] + 1
+            if removed is not None:
+                values[STAR_COLUMNS[removed].key] = STAR_COLUMNS[removed] - 1
+        stmt = (
+            update(Product)
+            .where(Product.id == product_id)
+            .values(values)
+            .returning(*self._stats_columns())
+            .execution_options(synchronize_session=False)
+        )
+        return self.db.execute(stmt).one()
 
     # -----------------
     # Comments
@@ -84,6 +159,20 @@ class ProductFeedbackRepository:
         )
         return list(self.db.scalars(stmt).all())
 
+    def list_comments_page(
+        self,
+        product_id: int,
+        skip: int = 0,
+        limit: int = 50,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[ProductComment], int | None, bool]:
+        stmt = (
+            select(ProductComment)
+            .where(ProductComment.product_id == product_id)
+            .order_by(ProductComment.created_at.desc(), ProductComment.id.desc())
+        )
+        return fetch_page(self.db, stmt, skip, limit, total_mode=total_mode)
+
     def count_comments(self, product_id: int) -> int:
         stmt = select(func.count()).select_from(ProductComment).where(ProductComment.product_id == product_id)
         return int(self.db.scalar(stmt) or 0)
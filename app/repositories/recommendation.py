@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.recommendation import UserRecommendation
+
+
+class UserRecommendationRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def product_ids(self, user_id: int, limit: int) -> list[int]:
+        stmt = (
+            select(UserRecommendation.product_id)
+            .where(UserRecommendation.user_id == user_id)
+            .order_by(UserRecommendation.rank)
+            .limit(limit)
+        )
+        return list(self.db.scalars(stmt).all())
+
+    def replace_all(self, rows: Iterable[dict], batch_size: int = 10_000) -> int:
+        """Swap the whole table for ``rows``, without committing (readers keep the old rows until commit)."""
+        self.db.execute(delete(UserRecommendation))
+        written, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                self.db.execute(insert(UserRecommendation), batch)
+                written, batch = written + len(batch), []
+        if batch:
+            self.db.execute(insert(UserRecommendation), batch)
+            written += len(batch)
+        return written
@@ -0,0 +1,24 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, require_admin
+from app.schemas.analytics import SalesGroupBy, SalesReport
+from app.services.analytics import AnalyticsService
+
+router = APIRouter(prefix="/admin/analytics", tags=["Analytics"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/sales", response_model=SalesReport)
+def sales(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    group_by: SalesGroupBy = SalesGroupBy.day,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    try:
+        return AnalyticsService(db).sales_report(date_from, date_to, group_by, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
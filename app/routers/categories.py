@@ -2,14 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File,
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, require_admin
+from app.repositories.paging import TotalMode
 from app.schemas.category import CategoryCreate, CategoryListResponse, CategoryRead, CategoryUpdate
 from app.services.category import CategoryService
+from app.utils.cache import catalog_version
 from app.utils.file_upload import save_file
+from app.utils.http_cache import ConditionalGet
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+catalog_etag = ConditionalGet(lambda: catalog_version.current)
 
-@router.get("", response_model=list[CategoryRead])
+
+@router.get("", response_model=list[CategoryRead], dependencies=[Depends(catalog_etag)])
 def list_categories(
     skip: int = 0,
     limit: int = 50,
@@ -18,16 +23,17 @@ def list_categories(
     return CategoryService(db).list_categories(skip, limit)
 
 
-@router.get("/paged", response_model=CategoryListResponse)
+@router.get("/paged", response_model=CategoryListResponse, dependencies=[Depends(catalog_etag)])
 def list_categories_paged(
     skip: int = 0,
     limit: int = 50,
+    total: TotalMode = TotalMode.exact,
     db: Session = Depends(get_db),
 ):
-    items, total, next_skip = CategoryService(db).list_categories_paged(skip, limit)
+    items, total_count, next_skip = CategoryService(db).list_categories_paged(skip, limit, total)
     return {
         "items": items,
-        "total": total,
+        "total": total_count,
         "skip": skip,
         "limit": limit,
         "next_skip": next_skip,
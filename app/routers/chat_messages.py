@@ -5,9 +5,12 @@ from app.core.deps import get_current_user, get_db
 from app.models.chat_message import ChatMessage
 from app.models.notification import Notification
 from app.schemas.chat_message import ChatMessageRead
+from app.utils.cache import MISSING
 from app.utils.file_upload import save_file
+from app.utils.idempotency import Idempotency, IdempotentRequest
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
+idempotency = Idempotency()
 
 
 @router.get("/with/{user_id}", response_model=list[ChatMessageRead])
@@ -35,7 +38,10 @@ async def send_message(
     file: UploadFile | None = File(None),  # media bo‘lsa
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
+    idempotent: IdempotentRequest = Depends(idempotency),
 ):
+    if idempotent.replay is not MISSING:
+        return idempotent.replay
     if message_type == "text":
         if not text:
             raise ValueError("text is required for message_type=text")
@@ -66,7 +72,7 @@ async def send_message(
 
     db.commit()
     db.refresh(msg)
-    return msg
+    return idempotent.save(ChatMessageRead.model_validate(msg))
 
 
 
@@ -1,79 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user, get_db, require_admin
-from app.schemas.order import OrderCreate, OrderListResponse, OrderRead
+from app.repositories.paging import TotalMode
+from app.schemas.order import (
+    OrderCreate,
+    OrderListResponse,
+    OrderRead,
+    OrderSummary,
+    OrderSummaryListResponse,
+    OrderView,
+)
+from app.services.notification import notify_new_order
 from app.services.order import OrderService
-from app.schemas.order import OrderStatusUpdate
+from app.utils.cache import MISSING
+from app.utils.idempotency import Idempotency, IdempotentRequest
+from app.schemas.order import OrderBulkStatusResult, OrderBulkStatusUpdate, OrderStatusUpdate
 from app.models.order import OrderStatus
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
+idempotency = Idempotency()
 
 
 @router.post("", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
-def create_order(payload: OrderCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def create_order(
+    payload: OrderCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    idempotent: IdempotentRequest = Depends(idempotency),
+):
+    if idempotent.replay is not MISSING:
+        return idempotent.replay
     try:
-        return OrderService(db).create_order(current_user.id, payload)
+        order = OrderService(db).create_order(current_user.id, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    background_tasks.add_task(notify_new_order, db.get_bind(), order.id)
+    return idempotent.save(OrderRead.model_validate(order))
 
 
-@router.get("/me", response_model=list[OrderRead])
+@router.get("/me", response_model=list[OrderRead] | list[OrderSummary])
 def list_my_orders(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=200),
+    view: OrderView = OrderView.full,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    return OrderService(db).list_user_orders(current_user.id, skip, limit)
+    try:
+        items, next_cursor = OrderService(db).list_user_orders(current_user.id, skip, limit, view, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
-@router.get("/me/paged", response_model=OrderListResponse)
+@router.get("/me/paged", response_model=OrderListResponse | OrderSummaryListResponse)
 def list_my_orders_paged(
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=200),
+    total: TotalMode = TotalMode.exact,
+    view: OrderView = OrderView.full,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    items, total, next_skip = OrderService(db).list_user_orders_paged(
-        current_user.id,
-        skip,
-        limit,
-    )
+    try:
+        items, total_count, next_skip, next_cursor = OrderService(db).list_user_orders_paged(
+            current_user.id,
+            skip,
+            limit,
+            total,
+            view,
+            cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {
         "items": items,
-        "total": total,
+        "total": total_count,
         "skip": skip,
         "limit": limit,
         "next_skip": next_skip,
+        "next_cursor": next_cursor,
     }
 
 
-@router.get("", response_model=list[OrderRead], dependencies=[Depends(require_admin)])
+@router.get("", response_model=list[OrderRead] | list[OrderSummary], dependencies=[Depends(require_admin)])
 def list_all_orders(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=200),
+    view: OrderView = OrderView.full,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    return OrderService(db).list_all_orders(skip, limit)
+    try:
+        items, next_cursor = OrderService(db).list_all_orders(skip, limit, view, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
-@router.get("/paged", response_model=OrderListResponse, dependencies=[Depends(require_admin)])
+@router.get(
+    "/paged",
+    response_model=OrderListResponse | OrderSummaryListResponse,
+    dependencies=[Depends(require_admin)],
+)
 def list_all_orders_paged(
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=200),
+    total: TotalMode = TotalMode.exact,
+    view: OrderView = OrderView.full,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    items, total, next_skip = OrderService(db).list_all_orders_paged(skip, limit)
+    try:
+        items, total_count, next_skip, next_cursor = OrderService(db).list_all_orders_paged(
+            skip,
+            limit,
+            total,
+            view,
+            cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {
         "items": items,
-        "total": total,
+        "total": total_count,
         "skip": skip,
         "limit": limit,
         "next_skip": next_skip,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/{order_id}", response_model=OrderRead)
+def get_order(order_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    order = OrderService(db).get_order(order_id, current_user.id, current_user.is_admin)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
 @router.put("/{order_id}/status", response_model=OrderRead, dependencies=[Depends(require_admin)])
 def update_order_status(order_id: int, payload: OrderStatusUpdate, db: Session = Depends(get_db)):
     try:
@@ -81,4 +156,13 @@ def update_order_status(order_id: int, payload: OrderStatusUpdate, db: Session =
         new_status = OrderStatus(payload.status)
         return OrderService(db).update_status(order_id, new_status)
     except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/status:bulk", response_model=OrderBulkStatusResult, dependencies=[Depends(require_admin)])
+def bulk_update_order_status(payload: OrderBulkStatusUpdate, db: Session = Depends(get_db)):
+    try:
+        new_status = OrderStatus(payload.status)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return OrderService(db).bulk_update_status(payload.order_ids, new_status)
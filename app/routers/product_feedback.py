@@ -3,31 +3,46 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_current_user_optional, get_db
+from app.repositories.paging import TotalMode
 from app.schemas.product_feedback import (
     ProductCommentCreate,
     ProductCommentListResponse,
     ProductCommentRead,
     ProductRatingMy,
     ProductRatingStats,
+    ProductRatingStatsBatchItem,
+    ProductRatingStatsBatchRequest,
     ProductRatingUpsert,
 )
 from app.services.product_feedback import ProductFeedbackService
+from app.utils.cache import MISSING
+from app.utils.idempotency import Idempotency, IdempotentRequest
 
 
 router = APIRouter(prefix="/products", tags=["Product Feedback"])
+idempotency = Idempotency()
 
 
 # -----------------
 # Ratings
 # -----------------
+@router.post("/ratings:batch", response_model=list[ProductRatingStatsBatchItem])
+def get_rating_stats_batch(
+    payload: ProductRatingStatsBatchRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_optional),
+):
+    user_id = current_user.id if current_user is not None else None
+    return ProductFeedbackService(db).get_rating_stats_many(payload.product_ids, user_id)
+
+
 @router.get("/{product_id}/rating", response_model=ProductRatingStats)
 def get_rating_stats(product_id: int, db: Session = Depends(get_db)):
     stats = ProductFeedbackService(db).get_rating_stats(product_id)
     if stats is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    avg_, count_ = stats
-    return {"product_id": product_id, "average": avg_, "count": count_}
+    return stats
 
 
 @router.get("/{product_id}/my-rating", response_model=ProductRatingMy)
@@ -49,13 +64,16 @@ def upsert_rating(
     payload: ProductRatingUpsert,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
+    idempotent: IdempotentRequest = Depends(idempotency),
 ):
+    if idempotent.replay is not MISSING:
+        return idempotent.replay
     if payload.rating < 1 or payload.rating > 5:
         raise HTTPException(status_code=422, detail="rating must be between 1 and 5")
-    obj = ProductFeedbackService(db).upsert_rating(product_id, current_user.id, payload.rating)
-    if obj is None:
+    stats = ProductFeedbackService(db).upsert_rating(product_id, current_user.id, payload.rating)
+    if stats is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return {"message": "ok"}
+    return idempotent.save({"message": "ok"})
 
 
 @router.delete("/{product_id}/rating", status_code=status.HTTP_204_NO_CONTENT)
@@ -78,13 +96,14 @@ def list_comments(
     product_id: int,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=50, ge=1, le=200),
+    total: TotalMode = TotalMode.exact,
     db: Session = Depends(get_db),
 ):
-    res = ProductFeedbackService(db).list_comments_paged(product_id, skip, limit)
+    res = ProductFeedbackService(db).list_comments_paged(product_id, skip, limit, total)
     if res is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    items, total, next_skip = res
-    return {"items": items, "total": total, "skip": skip, "limit": limit, "next_skip": next_skip}
+    items, total_count, next_skip = res
+    return {"items": items, "total": total_count, "skip": skip, "limit": limit, "next_skip": next_skip}
 
 
 @router.post(
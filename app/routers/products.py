@@ -1,30 +1,71 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.core.deps import get_db, require_admin
-from app.schemas.product import ProductCreate, ProductListResponse, ProductRead, ProductUpdate
-from app.services.product import ProductService
+from app.repositories.paging import TotalMode
+from app.schemas.product import (
+    ProductCreate,
+    ProductFacets,
+    ProductImportReport,
+    ProductListResponse,
+    ProductRead,
+    ProductSort,
+    ProductUpdate,
+)
+from app.services.product import ProductService, product_list_cache
+from app.services.product_export import ExportFormat, ProductExportService
+from app.services.product_import import ImportFormat, import_products
+from app.services.trending import trending
+from app.services.view_counter import view_counter
+from app.utils.cache import catalog_version, product_version
 from app.utils.file_upload import save_file
+from app.utils.http_cache import ConditionalGet
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-@router.get("", response_model=list[ProductRead])
+def _record_view(request: Request) -> None:
+    # a revalidated product page is still a view
+    product_id = int(request.path_params["product_id"])
+    view_counter.record(product_id)
+    trending.record_view(product_id)
+
+
+catalog_etag = ConditionalGet(product_version)
+product_etag = ConditionalGet(product_version, on_not_modified=_record_view)
+
+
+@router.get("", response_model=list[ProductRead], dependencies=[Depends(catalog_etag)])
 def list_products(
+    response: Response,
     q: str | None = None,
     category_id: int | None = None,
     price_min: float | None = Query(default=None, ge=0),
     price_max: float | None = Query(default=None, ge=0),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=50, ge=1, le=200),
+    sort: ProductSort | None = None,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    return ProductService(db).list_products(q, category_id, price_min, price_max, skip, limit)
-
-
-@router.get("/paged", response_model=ProductListResponse)
+    try:
+        items, next_cursor = ProductService(db).list_products(
+            q, category_id, price_min, price_max, skip, limit, sort=sort, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+@router.get("/paged", response_model=ProductListResponse, dependencies=[Depends(catalog_etag)])
 def list_products_paged(
     q: str | None = None,
     category_id: int | None = None,
@@ -32,30 +73,79 @@ def list_products_paged(
     price_max: float | None = Query(default=None, ge=0),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=50, ge=1, le=200),
+    sort: ProductSort | None = None,
+    cursor: str | None = None,
+    total: TotalMode = TotalMode.exact,
     db: Session = Depends(get_db),
 ):
-    items, total, next_skip = ProductService(db).list_products_paged(
-        q,
-        category_id,
-        price_min,
-        price_max,
-        skip,
-        limit,
-    )
+    try:
+        items, total_count, next_skip, next_cursor = ProductService(db).list_products_paged(
+            q,
+            category_id,
+            price_min,
+            price_max,
+            skip,
+            limit,
+            sort=sort,
+            cursor=cursor,
+            total_mode=total,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return {
         "items": items,
-        "total": total,
+        "total": total_count,
         "skip": skip,
         "limit": limit,
         "next_skip": next_skip,
+        "next_cursor": next_cursor,
     }
 
-@router.get("/count")
-def products_count(db: Session = Depends(get_db)):
-    total = ProductService(db).count_products()
+@router.get("/count", dependencies=[Depends(catalog_etag)])
+def products_count(
+    q: str | None = None,
+    category_id: int | None = None,
+    price_min: float | None = Query(default=None, ge=0),
+    price_max: float | None = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
+):
+    total = ProductService(db).count_products(q, category_id, price_min, price_max)
     return {"total": total}
 
-@router.get("/{product_id}", response_model=ProductRead)
+
+@router.get("/facets", response_model=ProductFacets, dependencies=[Depends(catalog_etag)])
+def product_facets(
+    q: str | None = None,
+    category_id: int | None = None,
+    price_min: float | None = Query(default=None, ge=0),
+    price_max: float | None = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
+):
+    return ProductService(db).product_facets(q, category_id, price_min, price_max)
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+def export_products(
+    format: ExportFormat = ExportFormat.ndjson,
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+):
+    media_type = "text/csv; charset=utf-8" if format == ExportFormat.csv else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="products.{format.value}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        ProductExportService(db).iter_bytes(format, gzip=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@router.get("/cache/stats", dependencies=[Depends(require_admin)])
+def products_cache_stats():
+    return {"generation": catalog_version.current, "listing": product_list_cache.stats()}
+
+@router.get("/{product_id}", response_model=ProductRead, dependencies=[Depends(product_etag)])
 def get_product(product_id: int, db: Session = Depends(get_db)):
     product = ProductService(db).get_product(product_id)
     if not product:
@@ -64,8 +154,8 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("", response_model=ProductRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
-def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
-    return ProductService(db).create_product(payload)
+def create_product(payload: ProductCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    return ProductService(db).create_product(payload, background_tasks)
 
 
 @router.post(
@@ -75,6 +165,7 @@ def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
     dependencies=[Depends(require_admin)],
 )
 async def create_product_with_image(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     description: str = Form(...),
     price: float = Form(...),
@@ -101,11 +192,43 @@ async def create_product_with_image(
         images=image_urls,
         variants=[],
     )
-    return ProductService(db).create_product(payload)
+    return ProductService(db).create_product(payload, background_tasks)
+
+@router.post(
+    "/bulk-import",
+    response_model=ProductImportReport,
+    dependencies=[Depends(require_admin)],
+)
+async def bulk_import_products(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: ImportFormat | None = None,
+    db: Session = Depends(get_db),
+):
+    fmt = format
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            fmt = ImportFormat.csv
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            fmt = ImportFormat.ndjson
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+            )
+    chunk_size = get_settings().product_import_chunk_size
+    return await import_products(db, request.stream(), fmt, chunk_size, background_tasks)
+
 
 @router.put("/{product_id}", response_model=ProductRead, dependencies=[Depends(require_admin)])
-def update_product(product_id: int, payload: ProductUpdate, db: Session = Depends(get_db)):
-    product = ProductService(db).update_product(product_id, payload)
+def update_product(
+    product_id: int,
+    payload: ProductUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    product = ProductService(db).update_product(product_id, payload, background_tasks)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
@@ -1,18 +1,95 @@
-from fastapi import APIRouter, Depends
+import time
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db
+from app.core.config import get_settings
+from app.core.deps import get_current_user, get_db
 from app.schemas.product import ProductRead
+from app.services.bought_together import bought_together
 from app.services.recommendation import RecommendationService
+from app.services.similar_products import similar_products
+from app.services.trending import TrendingWindow
+from app.utils.cache import catalog_version
+from app.utils.http_cache import ConditionalGet, json_response
 
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
+_settings = get_settings()
+_max_age = _settings.http_cache_max_age_seconds
+
+# views/sales move the rankings without a catalog write, so the version also rolls
+# over once per max-age window
+ranking_etag = ConditionalGet(lambda: (catalog_version.current, int(time.time()) // _max_age))
+# changes when a rebuilt index file is picked up
+bought_together_etag = ConditionalGet(lambda: (catalog_version.current, bought_together.version))
+# changes on a rebuild and on every incremental product upsert
+similar_etag = ConditionalGet(lambda: (catalog_version.current, similar_products.version))
+
+
+@router.get("/for-me", response_model=list[ProductRead])
+def for_me(
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=_settings.user_recommendations_top_n),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return json_response(RecommendationService(db).for_user(current_user.id, limit), response)
+
+
+@router.get("/most-viewed", response_model=list[ProductRead], dependencies=[Depends(ranking_etag)])
+def most_viewed(
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=_settings.leaderboard_size),
+    category_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    return json_response(RecommendationService(db).most_viewed(limit, category_id), response)
+
+
+@router.get("/most-sold", response_model=list[ProductRead], dependencies=[Depends(ranking_etag)])
+def most_sold(
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=_settings.leaderboard_size),
+    category_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    return json_response(RecommendationService(db).most_sold(limit, category_id), response)
+
+
+@router.get("/trending", response_model=list[ProductRead], dependencies=[Depends(ranking_etag)])
+def trending(
+    response: Response,
+    window: TrendingWindow = TrendingWindow.day,
+    limit: int = Query(default=10, ge=1, le=_settings.trending_size),
+    db: Session = Depends(get_db),
+):
+    return json_response(RecommendationService(db).trending(window, limit), response)
+
 
-@router.get("/most-viewed", response_model=list[ProductRead])
-def most_viewed(limit: int = 10, db: Session = Depends(get_db)):
-    return RecommendationService(db).most_viewed(limit)
+@router.get(
+    "/bought-together/{product_id}",
+    response_model=list[ProductRead],
+    dependencies=[Depends(bought_together_etag)],
+)
+def bought_together_with(
+    product_id: int,
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=_settings.bought_together_top_k),
+    db: Session = Depends(get_db),
+):
+    return json_response(RecommendationService(db).bought_with(product_id, limit), response)
 
 
-@router.get("/most-sold", response_model=list[ProductRead])
-def most_sold(limit: int = 10, db: Session = Depends(get_db)):
-    return RecommendationService(db).most_sold(limit)
+@router.get(
+    "/similar/{product_id}",
+    response_model=list[ProductRead],
+    dependencies=[Depends(similar_etag)],
+)
+def similar(
+    product_id: int,
+    response: Response,
+    limit: int = Query(default=10, ge=1, le=_settings.similar_products_top_k),
+    db: Session = Depends(get_db),
+):
+    return json_response(RecommendationService(db).similar(product_id, limit), response)
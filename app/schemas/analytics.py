@@ -0,0 +1,29 @@
+from datetime import date
+from enum import Enum
+
+from app.schemas.common import BaseSchema
+
+
+class SalesGroupBy(str, Enum):
+    day = "day"
+    category = "category"
+    product = "product"
+
+
+class SalesRow(BaseSchema):
+    day: date | None = None
+    category_id: int | None = None
+    category_name: str | None = None
+    product_id: int | None = None
+    product_name: str | None = None
+    units: int
+    revenue: float
+
+
+class SalesReport(BaseSchema):
+    date_from: date
+    date_to: date
+    group_by: SalesGroupBy
+    units: int
+    revenue: float
+    rows: list[SalesRow]
@@ -21,7 +21,7 @@ class CategoryRead(BaseSchema):
 
 class CategoryListResponse(BaseSchema):
     items: list[CategoryRead]
-    total: int
+    total: int | None
     skip: int
     limit: int
     next_skip: int | None
@@ -1,4 +1,7 @@
 from datetime import datetime
+from enum import Enum
+
+from pydantic import Field
 
 from app.schemas.common import BaseSchema
 from app.schemas.product import ProductRead, ProductVariantRead
@@ -43,12 +46,47 @@ class OrderRead(BaseSchema):
     created_at: datetime
 
 
+class OrderView(str, Enum):
+    full = "full"
+    summary = "summary"
+
+
+class OrderSummary(BaseSchema):
+    id: int
+    status: str
+    delivery_address_text: str | None
+    total: float
+    item_count: int
+    thumbnail_url: str | None = None
+    created_at: datetime
+
+
 class OrderListResponse(BaseSchema):
     items: list[OrderRead]
-    total: int
+    total: int | None
+    skip: int
+    limit: int
+    next_skip: int | None
+    next_cursor: str | None = None
+
+
+class OrderSummaryListResponse(BaseSchema):
+    items: list[OrderSummary]
+    total: int | None
     skip: int
     limit: int
     next_skip: int | None
+    next_cursor: str | None = None
 
 class OrderStatusUpdate(BaseSchema):
-    status: str
\ No newline at end of file
+    status: str
+
+
+class OrderBulkStatusUpdate(BaseSchema):
+    order_ids: list[int] = Field(min_length=1, max_length=1000)
+    status: str
+
+
+class OrderBulkStatusResult(BaseSchema):
+    updated: list[int]
+    not_found: list[int]
\ No newline at end of file
@@ -1,9 +1,19 @@
 from datetime import datetime
+from enum import Enum
 
 from app.schemas.common import BaseSchema
 from app.schemas.category import CategoryRead
 
 
+class ProductSort(str, Enum):
+    id = "id"
+    newest = "newest"
+    oldest = "oldest"
+    price_asc = "price_asc"
+    price_desc = "price_desc"
+    relevance = "relevance"
+
+
 class ProductImageRead(BaseSchema):
     id: int
     url: str
@@ -59,7 +69,39 @@ class ProductRead(BaseSchema):
 
 class ProductListResponse(BaseSchema):
     items: list[ProductRead]
-    total: int
+    total: int | None
     skip: int
     limit: int
     next_skip: int | None
+    next_cursor: str | None = None
+
+
+class CategoryFacet(BaseSchema):
+    category_id: int
+    count: int
+
+
+class PriceBucketFacet(BaseSchema):
+    min: float
+    max: float | None
+    count: int
+
+
+class ProductFacets(BaseSchema):
+    total: int
+    in_stock: int
+    out_of_stock: int
+    categories: list[CategoryFacet]
+    price_buckets: list[PriceBucketFacet]
+
+
+class ProductImportError(BaseSchema):
+    row: int
+    error: str
+
+
+class ProductImportReport(BaseSchema):
+    received: int
+    created: int
+    failed: int
+    errors: list[ProductImportError]
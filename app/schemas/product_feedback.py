@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime
 
+from pydantic import Field
+
 from app.schemas.common import BaseSchema
 
 
@@ -13,6 +15,17 @@ class ProductRatingStats(BaseSchema):
     product_id: int
     average: float
     count: int
+    # number of ratings per star, "1".."5"
+    histogram: dict[int, int]
+
+
+class ProductRatingStatsBatchRequest(BaseSchema):
+    product_ids: list[int] = Field(min_length=1, max_length=200)
+
+
+class ProductRatingStatsBatchItem(ProductRatingStats):
+    # the caller's own rating; always null for anonymous requests
+    my_rating: int | None = None
 
 
 class ProductRatingMy(BaseSchema):
@@ -34,7 +47,7 @@ class ProductCommentRead(BaseSchema):
 
 class ProductCommentListResponse(BaseSchema):
     items: list[ProductCommentRead]
-    total: int
+    total: int | None
     skip: int
     limit: int
     next_skip: int | None
@@ -0,0 +1,38 @@
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.repositories.analytics import AnalyticsRepository
+from app.schemas.analytics import SalesGroupBy, SalesReport, SalesRow
+
+
+class AnalyticsService:
+    """Sales reports read from the daily rollup tables, never from order_items.
+
+    The rollups are kept current by OrderService when orders become delivered/success;
+    scripts/backfill_sales_rollups.py rebuilds them from scratch.
+    """
+
+    def __init__(self, db: Session):
+        self.repo = AnalyticsRepository(db)
+
+    def sales_report(self, date_from: date, date_to: date, group_by: SalesGroupBy, limit: int = 100) -> SalesReport:
+        if date_from > date_to:
+            raise ValueError("'from' must not be after 'to'")
+
+        days = self.repo.sales_by_day(date_from, date_to)
+        if group_by == SalesGroupBy.day:
+            rows = days
+        elif group_by == SalesGroupBy.category:
+            rows = self.repo.sales_by_category(date_from, date_to, limit)
+        else:
+            rows = self.repo.sales_by_product(date_from, date_to, limit)
+
+        return SalesReport(
+            date_from=date_from,
+            date_to=date_to,
+            group_by=group_by,
+            units=sum(int(row.units) for row in days),
+            revenue=sum(float(row.revenue) for row in days),
+            rows=[SalesRow.model_validate(row) for row in rows],
+        )
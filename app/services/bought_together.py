@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import get_settings
+
+
+class CoOccurrenceScore(str, Enum):
+    lift = "lift"
+    cosine = "cosine"
+
+
+@dataclass(frozen=True)
+class CoOccurrenceIndex:
+    """Top-K "bought together" neighbours per product in CSR layout.
+
+    ``neighbors[indptr[row]:indptr[row + 1]]`` are the neighbours of ``product_ids[row]``,
+    best first, with their ``scores``. ``rows`` maps a product id to its row.
+    """
+
+    product_ids: np.ndarray
+    indptr: np.ndarray
+    neighbors: np.ndarray
+    scores: np.ndarray
+    rows: dict[int, int]
+
+    @classmethod
+    def from_arrays(cls, product_ids, indptr, neighbors, scores) -> "CoOccurrenceIndex":
+        rows = {int(product_id): row for row, product_id in enumerate(product_ids)}
+        return cls(product_ids, indptr, neighbors, scores, rows)
+
+    @classmethod
+    def empty(cls) -> "CoOccurrenceIndex":
+        return cls.from_arrays(
+            np.empty(0, np.int64), np.zeros(1, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+        )
+
+    def lookup(self, product_id: int, limit: int) -> list[int]:
+        row = self.rows.get(product_id)
+        if row is None:
+            return []
+        start = self.indptr[row]
+        return self.neighbors[start : min(start + limit, self.indptr[row + 1])].tolist()
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write to ``path`` atomically: readers see the old file or the new one."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, product_ids=self.product_ids, indptr=self.indptr, neighbors=self.neighbors, scores=self.scores)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "CoOccurrenceIndex":
+        with np.load(path) as data:
+            return cls.from_arrays(data["product_ids"], data["indptr"], data["neighbors"], data["scores"])
+
+
+def build_index(
+    order_ids: np.ndarray,
+    product_ids: np.ndarray,
+    top_k: int = 50,
+    score: CoOccurrenceScore = CoOccurrenceScore.lift,
+    min_support: int = 2,
+    max_basket: int = 50,
+) -> CoOccurrenceIndex:
+    """Build the index from parallel (order_id, product_id) arrays, one per order line.
+
+    Every pair of distinct products in an order counts once. Orders with more than
+    ``max_basket`` products are skipped (bulk buys say little about affinity and cost
+    quadratically), as are pairs seen in fewer than ``min_support`` orders.
+    """
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    if order_ids.size == 0:
+        return CoOccurrenceIndex.empty()
+
+    # dense product codes, one row per distinct (order, product), sorted by order
+    catalog, codes = np.unique(product_ids, return_inverse=True)
+    lines = np.unique(np.stack([order_ids, codes], axis=1), axis=0)
+    _orders, starts, sizes = np.unique(lines[:, 0], return_index=True, return_counts=True)
+    keep = (sizes >= 2) & (sizes <= max_basket)
+    if not keep.any():
+        return CoOccurrenceIndex.empty()
+    n_orders = int(sizes.size)
+    item_support = np.bincount(lines[:, 1], minlength=catalog.size)
+
+    # expand each kept basket of n lines into its n * n (left, right) positions
+    kept_lines = np.flatnonzero(np.repeat(keep, sizes))
+    line_starts = np.repeat(starts[keep], sizes[keep])
+    line_sizes = np.repeat(sizes[keep], sizes[keep])
+    left = np.repeat(kept_lines, line_sizes)
+    offsets = np.arange(left.size) - np.repeat(np.cumsum(line_sizes) - line_sizes, line_sizes)
+    right = np.repeat(line_starts, line_sizes) + offsets
+    left_codes, right_codes = lines[left, 1], lines[right, 1]
+    distinct = left_codes != right_codes
+
+    pair_keys, pair_counts = np.unique(
+        left_codes[distinct] * catalog.size + right_codes[distinct], return_counts=True
+    )
+    supported = pair_counts >= min_support
+    pair_keys, pair_counts = pair_keys[supported], pair_counts[supported].astype(np.float64)
+    src, dst = pair_keys // catalog.size, pair_keys % catalog.size
+
+    if score == CoOccurrenceScore.lift:
+        scores = pair_counts * n_orders / (item_support[src] * item_support[dst])
+    else:
+        scores = pair_counts / np.sqrt(item_support[src] * item_support[dst])
+
+    # best ``top_k`` per source: sort by (src, -score, dst), keep the first rows of each run
+    order = np.lexsort((dst, -scores, src))
+    src, dst, scores = src[order], dst[order], scores[order]
+    sources, run_starts, run_sizes = np.unique(src, return_index=True, return_counts=True)
+    rank = np.arange(src.size) - np.repeat(run_starts, run_sizes)
+    top = rank < top_k
+    counts = np.minimum(run_sizes, top_k)
+
+    return CoOccurrenceIndex.from_arrays(
+        product_ids=catalog[sources],
+        indptr=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        neighbors=catalog[dst[top]],
+        scores=scores[top].astype(np.float32),
+    )
+
+
+class BoughtTogether:
+    """Holds the current index and swaps in a rebuilt file without a restart.
+
+    The file's mtime is checked at most every ``check_interval`` seconds; a changed file
+    is loaded off to the side and replaces the old index with a single assignment, so
+    lookups never see a half-loaded index.
+    """
+
+    def __init__(self, path: str | os.PathLike, check_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.clock = clock
+        self.index = CoOccurrenceIndex.empty()
+        self.version = 0
+        self._mtime: float | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, product_id: int, limit: int) -> list[int]:
+        if self.clock() >= self._next_check:
+            self.reload()
+        return self.index.lookup(product_id, limit)
+
+    def reload(self, force: bool = False) -> bool:
+        with self._lock:
+            self._next_check = self.clock() + self.check_interval
+            try:
+                mtime = self.path.stat().st_mtime
+            except FileNotFoundError:
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            self.index = CoOccurrenceIndex.load(self.path)
+            self._mtime = mtime
+            self.version += 1
+            return True
+
+
+_settings = get_settings()
+
+bought_together = BoughtTogether(
+    _settings.bought_together_index_path,
+    check_interval=_settings.bought_together_reload_seconds,
+)
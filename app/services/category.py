@@ -2,7 +2,9 @@ from sqlalchemy.orm import Session
 
 from app.models.category import Category
 from app.repositories.category import CategoryRepository
+from app.repositories.paging import TotalMode
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.utils.cache import catalog_version
 
 
 class CategoryService:
@@ -12,10 +14,14 @@ class CategoryService:
     def list_categories(self, skip: int, limit: int):
         return self.repo.list(skip=skip, limit=limit)
 
-    def list_categories_paged(self, skip: int, limit: int) -> tuple[list[Category], int, int | None]:
-        items = self.repo.list(skip=skip, limit=limit)
-        total = self.repo.count()
-        next_skip = skip + limit if skip + limit < total else None
+    def list_categories_paged(
+        self,
+        skip: int,
+        limit: int,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[Category], int | None, int | None]:
+        items, total, has_more = self.repo.list_page(skip=skip, limit=limit, total_mode=total_mode)
+        next_skip = skip + limit if has_more else None
         return items, total, next_skip
 
     def create_category(self, payload: CategoryCreate):
@@ -23,7 +29,9 @@ class CategoryService:
             name=payload.name,
             icon_url=payload.icon_url
         )
-        return self.repo.create(category)
+        created = self.repo.create(category)
+        catalog_version.bump()
+        return created
 
     def update_category(self, category_id: int, payload: CategoryUpdate):
         category = self.repo.get(category_id)
@@ -32,11 +40,14 @@ class CategoryService:
 
         category.name = payload.name
         category.icon_url = payload.icon_url
-        return self.repo.update(category)
+        updated = self.repo.update(category)
+        catalog_version.bump()
+        return updated
 
     def delete_category(self, category_id: int) -> bool:
         category = self.repo.get(category_id)
         if not category:
             return False
         self.repo.delete(category)
+        catalog_version.bump()
         return True
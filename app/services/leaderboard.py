@@ -0,0 +1,97 @@
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import get_settings
+from app.models.product import Product
+from app.schemas.product import ProductRead
+from app.utils.cache import catalog_version
+
+
+class LeaderboardMetric(str, Enum):
+    views = "views"
+    sold = "sold"
+
+
+METRIC_COLUMNS = {
+    LeaderboardMetric.views: Product.views_count,
+    LeaderboardMetric.sold: Product.sold_count,
+}
+
+
+@dataclass
+class _Board:
+    payloads: list[bytes]
+    version: tuple[int, int]
+    expires_at: float
+
+
+class Leaderboards:
+    """In-memory top-``size`` product rankings, global and per category.
+
+    Every board holds ProductRead payloads already serialized to JSON, so serving one
+    only slices and joins bytes. Boards are built one at a time on first use and go
+    stale after ``ttl`` seconds, after a catalog write, or after ``invalidate()`` (order
+    delivery); a stale board is rebuilt by the next request for it, and requests that
+    arrive meanwhile keep getting the stale copy instead of waiting.
+    """
+
+    def __init__(self, size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self._boards: dict[tuple[LeaderboardMetric, int | None], _Board] = {}
+        self._building: set[tuple[LeaderboardMetric, int | None]] = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def top(self, db: Session, metric: LeaderboardMetric, category_id: int | None = None, limit: int = 10) -> bytes:
+        """JSON array of the first ``limit`` (at most ``size``) products of a board."""
+        entries = self._current(db, (metric, category_id))
+        return b"[" + b",".join(entries[:limit]) + b"]"
+
+    def _current(self, db: Session, key: tuple[LeaderboardMetric, int | None]) -> list[bytes]:
+        with self._lock:
+            version = (catalog_version.current, self._generation)
+            board = self._boards.get(key)
+            if board is not None and (
+                key in self._building or (board.version == version and self.clock() < board.expires_at)
+            ):
+                return board.payloads
+            self._building.add(key)
+        try:
+            payloads = self._build(db, *key)
+        finally:
+            with self._lock:
+                self._building.discard(key)
+        with self._lock:
+            self._boards[key] = _Board(payloads, version, self.clock() + self.ttl)
+        return payloads
+
+    def _build(self, db: Session, metric: LeaderboardMetric, category_id: int | None) -> list[bytes]:
+        column = METRIC_COLUMNS[metric]
+        # ORDER BY ... LIMIT read off the (metric DESC, id) or (category_id, metric DESC, id)
+        # index instead of ranking the whole table
+        stmt = (
+            select(Product)
+            .order_by(column.desc(), Product.id)
+            .limit(self.size)
+            .options(selectinload(Product.images), selectinload(Product.category), selectinload(Product.variants))
+        )
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
+        return [ProductRead.model_validate(product).model_dump_json().encode() for product in db.scalars(stmt)]
+
+
+_settings = get_settings()
+
+leaderboards = Leaderboards(size=_settings.leaderboard_size, ttl=_settings.leaderboard_refresh_seconds)
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, false, insert, literal, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification
+from app.models.user import User
+
+
+class NotificationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def notify_admins(self, type: str, title: str, body: str, data: dict | None = None) -> int:
+        """Fan one notification out to every admin with a single INSERT ... SELECT.
+
+        Admin ids never leave the database, so the cost is one statement whatever the
+        number of admins. Returns the number of notifications written; does not commit.
+        """
+        admins = select(
+            User.id,
+            literal(type),
+            literal(title),
+            literal(body),
+            literal(data, JSON),
+            false(),
+            literal(datetime.utcnow()),
+        ).where(User.is_admin.is_(True))
+        stmt = insert(Notification).from_select(
+            ["recipient_user_id", "type", "title", "body", "data", "is_read", "created_at"],
+            admins,
+        )
+        return self.db.execute(stmt).rowcount
+
+
+def notify_new_order(bind: Engine | Connection, order_id: int) -> None:
+    """Post-commit hook for checkout, run as a background task after the response.
+
+    It gets its own session because the request session may already be closed.
+    """
+    with Session(bind=bind) as db:
+        NotificationService(db).notify_admins(
+            type="new_order",
+            title="New order received",
+            body=f"Order #{order_id}",
+            data={"order_id": order_id},
+        )
+        db.commit()
@@ -1,11 +1,22 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.order import Order, OrderItem, OrderStatus
-from app.models.notification import Notification
-from app.models.user import User
+from app.repositories.analytics import AnalyticsRepository
 from app.repositories.order import OrderRepository
+from app.repositories.paging import TotalMode
 from app.repositories.product import ProductRepository
-from app.schemas.order import OrderCreate
+from app.schemas.order import OrderCreate, OrderView
+from app.services.leaderboard import leaderboards
+from app.services.trending import trending
+from app.utils.cache import counters_version
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+DELIVERED_STATUSES = (OrderStatus.delivered, OrderStatus.success)
 
 
 class OrderService:
@@ -13,116 +24,229 @@ class OrderService:
         self.db = db
         self.order_repo = OrderRepository(db)
         self.product_repo = ProductRepository(db)
+        self.analytics_repo = AnalyticsRepository(db)
 
     def create_order(self, user_id: int, payload: OrderCreate):
-        items: list[OrderItem] = []
-
         for item in payload.items:
             if item.quantity <= 0:
                 raise ValueError("Quantity must be greater than zero")
 
-            product = self.product_repo.get(item.product_id)
-            if not product:
-                raise ValueError("Product not found")
-            if product.stock_count < item.quantity:
-                raise ValueError(f"Out of stock: product_id={product.id}")
+        # one lean IN query each for products and variants, however many lines the order has
+        prices = self.product_repo.prices_by_id(item.product_id for item in payload.items)
+        variant_ids = [item.variant_id for item in payload.items if item.variant_id is not None]
+        variants = self.product_repo.variants_by_id(variant_ids) if variant_ids else {}
 
-            unit_price = product.price
-            variant_id = None
+        rows: list[dict] = []
+        for item in payload.items:
+            if item.product_id not in prices:
+                raise ValueError("Product not found")
 
+            unit_price = prices[item.product_id]
             if item.variant_id is not None:
-                variant = self.product_repo.get_variant(item.variant_id)
-                if not variant or variant.product_id != product.id:
+                variant = variants.get(item.variant_id)
+                if not variant or variant.product_id != item.product_id:
                     raise ValueError("Invalid product variant")
                 unit_price = variant.price
-                variant_id = variant.id
-
-            items.append(
-                OrderItem(
-                    product_id=product.id,
-                    variant_id=variant_id,
-                    quantity=item.quantity,
-                    unit_price=unit_price,
-                )
+
+            rows.append(
+                {
+                    "product_id": item.product_id,
+                    "variant_id": item.variant_id,
+                    "quantity": item.quantity,
+                    "unit_price": unit_price,
+                }
             )
 
         order = Order(
             user_id=user_id,
             status=OrderStatus.pending,
-            items=items,
             delivery_address_text=payload.delivery_address_text,
             delivery_lat=payload.delivery_lat,
             delivery_lng=payload.delivery_lng,
             delivery_note=payload.delivery_note,
         )
-        created = self.order_repo.create(order)
-
-        for oi in created.items:
-            product = self.product_repo.get(oi.product_id)
-            if product:
-                product.stock_count -= oi.quantity
-                self.db.add(product)
-
-        admins = self.db.query(User).filter(User.is_admin == True).all()  # noqa: E712
-        for admin in admins:
-            self.db.add(
-                Notification(
-                    recipient_user_id=admin.id,
-                    type="new_order",
-                    title="New order received",
-                    body=f"Order #{created.id}",
-                    data={"order_id": created.id},
-                )
-            )
-
+        self.db.add(order)
+        self.db.flush()
+        # one executemany for the lines; the ORM would insert them one by one to collect ids
+        self.db.execute(insert(OrderItem), [{"order_id": order.id, **row} for row in rows])
+
+        # stock is checked and taken by the database in the same transaction as the order
+        # insert, so concurrent checkouts can't both pass a stale check
+        requested: Counter[int] = Counter()
+        for row in rows:
+            requested[row["product_id"]] += row["quantity"]
+        reserved = self.product_repo.reserve_stock(requested)
+        if len(reserved) != len(requested):
+            self.db.rollback()
+            missing = min(set(requested) - reserved)
+            raise ValueError(f"Out of stock: product_id={missing}")
+
+        # admin notifications are not part of checkout; the router schedules
+        # notify_new_order once this has committed
         self.db.commit()
-        self.db.refresh(created)
-
-        return created
-
-    def list_user_orders(self, user_id: int, skip: int, limit: int):
-        return self.order_repo.list_by_user(user_id, skip=skip, limit=limit)
-
-    def list_all_orders(self, skip: int, limit: int):
-        return self.order_repo.list_all(skip=skip, limit=limit)
-
-    def list_user_orders_paged(self, user_id: int, skip: int, limit: int):
-        items = self.order_repo.list_by_user(user_id, skip=skip, limit=limit)
-        total = self.order_repo.count_by_user(user_id)
-        next_skip = skip + limit if skip + limit < total else None
-        return items, total, next_skip
-
-    def list_all_orders_paged(self, skip: int, limit: int):
-        items = self.order_repo.list_all(skip=skip, limit=limit)
-        total = self.order_repo.count_all()
-        next_skip = skip + limit if skip + limit < total else None
-        return items, total, next_skip
+        # stock_count moved
+        counters_version.bump()
+        trending.record_sales(requested)
+
+        # reload once with the graph OrderRead needs instead of lazy loads per item
+        return self.order_repo.get(order.id)
+
+    def list_user_orders(
+        self,
+        user_id: int,
+        skip: int,
+        limit: int,
+        view: OrderView = OrderView.full,
+        cursor: str | None = None,
+    ) -> tuple[list, str | None]:
+        return self._list(user_id, skip, limit, view, cursor)
+
+    def list_all_orders(
+        self,
+        skip: int,
+        limit: int,
+        view: OrderView = OrderView.full,
+        cursor: str | None = None,
+    ) -> tuple[list, str | None]:
+        return self._list(None, skip, limit, view, cursor)
+
+    def list_user_orders_paged(
+        self,
+        user_id: int,
+        skip: int,
+        limit: int,
+        total_mode: TotalMode = TotalMode.exact,
+        view: OrderView = OrderView.full,
+        cursor: str | None = None,
+    ):
+        return self._list_paged(user_id, skip, limit, total_mode, view, cursor)
+
+    def list_all_orders_paged(
+        self,
+        skip: int,
+        limit: int,
+        total_mode: TotalMode = TotalMode.exact,
+        view: OrderView = OrderView.full,
+        cursor: str | None = None,
+    ):
+        return self._list_paged(None, skip, limit, total_mode, view, cursor)
+
+    def _list(
+        self,
+        user_id: int | None,
+        skip: int,
+        limit: int,
+        view: OrderView,
+        cursor: str | None,
+    ) -> tuple[list, str | None]:
+        after = None
+        if cursor:
+            after = self._decode_cursor(cursor)
+            skip = 0
+        # one extra row tells us whether there is a next page without a count query
+        if view == OrderView.summary:
+            rows = self.order_repo.list_summaries(skip=skip, limit=limit + 1, user_id=user_id, after=after)
+        elif user_id is None:
+            rows = self.order_repo.list_all(skip=skip, limit=limit + 1, after=after)
+        else:
+            rows = self.order_repo.list_by_user(user_id, skip=skip, limit=limit + 1, after=after)
+        items = rows[:limit]
+        next_cursor = self._encode_cursor(items[-1]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def _list_paged(
+        self,
+        user_id: int | None,
+        skip: int,
+        limit: int,
+        total_mode: TotalMode,
+        view: OrderView,
+        cursor: str | None,
+    ):
+        if cursor:
+            # keyset pages can't carry the total in a window, it would only count rows past the cursor
+            items, next_cursor = self._list(user_id, skip, limit, view, cursor)
+            total = None
+            if total_mode != TotalMode.none:
+                total = self.order_repo.count_all() if user_id is None else self.order_repo.count_by_user(user_id)
+            return items, total, None, next_cursor
+
+        if view == OrderView.summary:
+            items, total, has_more = self.order_repo.list_summaries_page(
+                skip=skip, limit=limit, user_id=user_id, total_mode=total_mode
+            )
+        elif user_id is None:
+            items, total, has_more = self.order_repo.list_all_page(skip=skip, limit=limit, total_mode=total_mode)
+        else:
+            items, total, has_more = self.order_repo.list_by_user_page(
+                user_id, skip=skip, limit=limit, total_mode=total_mode
+            )
+        next_skip = skip + limit if has_more else None
+        next_cursor = self._encode_cursor(items[-1]) if has_more else None
+        return items, total, next_skip, next_cursor
+
+    @staticmethod
+    def _encode_cursor(order) -> str:
+        # works for Order entities and summary rows alike
+        return encode_cursor({"keys": [order.created_at.isoformat(), order.id]})
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+        raw = decode_cursor(cursor).get("keys")
+        if not isinstance(raw, list) or len(raw) != 2:
+            raise ValueError("Invalid cursor")
+        try:
+            return datetime.fromisoformat(raw[0]), int(raw[1])
+        except (TypeError, ValueError) as exc:
+            raise ValueError("Invalid cursor") from exc
+
+    def get_order(self, order_id: int, user_id: int, is_admin: bool = False) -> Order | None:
+        """Full order graph for its owner or an admin; None otherwise."""
+        order = self.order_repo.get(order_id)
+        if order is None or (order.user_id != user_id and not is_admin):
+            return None
+        return order
 
     def update_status(self, order_id: int, new_status: OrderStatus) -> Order:
-        order = self.order_repo.get(order_id)
-        if not order:
+        result = self.bulk_update_status([order_id], new_status)
+        if not result["updated"]:
             raise ValueError("Order not found")
-
-        old_status = order.status
-
-        # delivered/success ga o'tish flagi
-        was_delivered = old_status in (OrderStatus.delivered, OrderStatus.success)
-        will_be_delivered = new_status in (OrderStatus.delivered, OrderStatus.success)
-
-        # statusni o'zgartiramiz
-        order.status = new_status
-        self.db.add(order)
-
-        if not was_delivered and will_be_delivered:
-            for oi in order.items:
-                product = self.product_repo.get(oi.product_id)
-                if product:
-                    product.sold_count += oi.quantity
-                    self.db.add(product)
+        # sold_count/status were written with bulk UPDATEs, so load the order fresh
+        self.db.expire_all()
+        return self.order_repo.get(order_id)
+
+    def bulk_update_status(self, order_ids: list[int], new_status: OrderStatus) -> dict[str, list[int]]:
+        """Move ``order_ids`` to ``new_status`` in one transaction.
+
+        The orders are row-locked first so a concurrent transition can't count the same
+        delivery twice; then one UPDATE sets the status, and the orders that become
+        delivered/success just now get their sold quantities added with one UPDATE ... FROM
+        and are folded into the daily sales rollups. Orders leaving delivered/success are
+        taken back out of the rollups, so a later re-delivery does not count twice.
+        """
+        current = self.order_repo.lock_statuses(order_ids)
+        updated = sorted(current)
+        not_found = sorted(set(order_ids) - set(current))
+        if not updated:
+            self.db.rollback()
+            return {"updated": updated, "not_found": not_found}
+
+        self.order_repo.set_status(updated, new_status)
+        newly_delivered: list[int] = []
+        if new_status in DELIVERED_STATUSES:
+            # delivered/success ga o'tish: sold_count faqat birinchi marta oshadi
+            newly_delivered = [oid for oid, status in current.items() if status not in DELIVERED_STATUSES]
+            if newly_delivered:
+                self.product_repo.add_sold_for_orders(newly_delivered)
+                self.analytics_repo.add_orders(newly_delivered)
+        else:
+            undelivered = [oid for oid, status in current.items() if status in DELIVERED_STATUSES]
+            if undelivered:
+                self.analytics_repo.subtract_orders(undelivered)
 
         self.db.commit()
-
-        # refresh order
-        self.db.refresh(order)
-
-        return order
\ No newline at end of file
+        if newly_delivered:
+            # sold_count moved; the most-sold boards rebuild on next use
+            counters_version.bump()
+            leaderboards.invalidate()
+        return {"updated": updated, "not_found": not_found}
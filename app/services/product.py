@@ -1,14 +1,65 @@
+from datetime import datetime
+from decimal import Decimal
+
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.models.product import Product
-from app.repositories.product import ProductRepository
-from app.schemas.product import ProductCreate, ProductUpdate
-from fastapi import HTTPException, status
+from app.repositories.paging import TotalMode
+from app.repositories.product import SORT_KEYS, ProductRepository
+from app.schemas.product import (
+    CategoryFacet,
+    PriceBucketFacet,
+    ProductCreate,
+    ProductFacets,
+    ProductRead,
+    ProductSort,
+    ProductUpdate,
+)
+from app.services.similar_products import ProductDocument, schedule_similar_refresh
+from app.services.trending import trending
+from app.services.view_counter import view_counter
+from app.utils.cache import MISSING, TTLCache, catalog_version, product_version
+from app.utils.pagination import decode_cursor, encode_cursor
+from fastapi import BackgroundTasks, HTTPException, status
 from sqlalchemy import select, func
 from app.models.order import OrderItem
 from app.models.product import ProductImage
 
 
+_settings = get_settings()
+
+# Listing/count responses keyed by (generation, normalized filters, page). Product and
+# category writes bump the catalog generation; listings also key on counters_version
+# (stock, sold, ratings) like their ETags, so a new ETag means new content. Views lag.
+product_list_cache = TTLCache(
+    maxsize=_settings.catalog_cache_max_entries,
+    ttl=_settings.catalog_cache_ttl_seconds,
+)
+
+# ProductRead JSON per product, keyed by (catalog generation, id), for routes that
+# assemble product lists from precomputed ids (recommendations)
+product_payload_cache = TTLCache(
+    maxsize=_settings.product_payload_cache_max_entries,
+    ttl=_settings.catalog_cache_ttl_seconds,
+)
+
+
+def _normalize_filters(
+    query: str | None,
+    category_id: int | None,
+    price_min: float | None,
+    price_max: float | None,
+) -> tuple:
+    query = (query or "").strip() or None
+    return (
+        query,
+        category_id or None,
+        float(price_min) if price_min is not None else None,
+        float(price_max) if price_max is not None else None,
+    )
+
+
 class ProductService:
     def __init__(self, db: Session):
         self.repo = ProductRepository(db)
@@ -21,15 +72,49 @@ class ProductService:
         price_max: float | None,
         skip: int,
         limit: int,
-    ):
-        return self.repo.list(
+        sort: ProductSort | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[ProductRead], str | None]:
+        query, category_id, price_min, price_max = _normalize_filters(query, category_id, price_min, price_max)
+        after = None
+        if cursor:
+            sort, after = self._decode_cursor(sort, cursor)
+            skip = 0
+        elif sort is None:
+            sort = ProductSort.relevance if query else ProductSort.id
+
+        key = ("list", product_version(), query, category_id, price_min, price_max, sort, cursor, skip, limit)
+        return product_list_cache.get_or_set(
+            key,
+            lambda: self._load_page(query, category_id, price_min, price_max, skip, limit, sort, after),
+        )
+
+    def _load_page(
+        self,
+        query: str | None,
+        category_id: int | None,
+        price_min: float | None,
+        price_max: float | None,
+        skip: int,
+        limit: int,
+        sort: ProductSort,
+        after: list | None,
+    ) -> tuple[list[ProductRead], str | None]:
+        # one extra row tells us whether there is a next page without a count query
+        rows = self.repo.list(
             query=query,
             category_id=category_id,
             price_min=price_min,
             price_max=price_max,
             skip=skip,
-            limit=limit,
+            limit=limit + 1,
+            sort=sort,
+            after=after,
         )
+        items = rows[:limit]
+        has_more = len(rows) > limit and sort != ProductSort.relevance
+        next_cursor = self._encode_cursor(sort, items[-1]) if has_more else None
+        return [ProductRead.model_validate(item) for item in items], next_cursor
 
     def list_products_paged(
         self,
@@ -39,31 +124,195 @@ class ProductService:
         price_max: float | None,
         skip: int,
         limit: int,
-    ) -> tuple[list[Product], int, int | None]:
-        items = self.repo.list(
+        sort: ProductSort | None = None,
+        cursor: str | None = None,
+        total_mode: TotalMode = TotalMode.exact,
+    ) -> tuple[list[ProductRead], int | None, int | None, str | None]:
+        if cursor:
+            # keyset pages can't carry the total in a window, it would only count rows past the cursor
+            items, next_cursor = self.list_products(
+                query,
+                category_id,
+                price_min,
+                price_max,
+                skip,
+                limit,
+                sort=sort,
+                cursor=cursor,
+            )
+            total = None
+            if total_mode != TotalMode.none:
+                total = self.count_products(query, category_id, price_min, price_max)
+            return items, total, None, next_cursor
+
+        query, category_id, price_min, price_max = _normalize_filters(query, category_id, price_min, price_max)
+        if sort is None:
+            sort = ProductSort.relevance if query else ProductSort.id
+        key = ("paged", product_version(), query, category_id, price_min, price_max, sort, skip, limit, total_mode)
+        return product_list_cache.get_or_set(
+            key,
+            lambda: self._load_paged(query, category_id, price_min, price_max, skip, limit, sort, total_mode),
+        )
+
+    def _load_paged(
+        self,
+        query: str | None,
+        category_id: int | None,
+        price_min: float | None,
+        price_max: float | None,
+        skip: int,
+        limit: int,
+        sort: ProductSort,
+        total_mode: TotalMode,
+    ) -> tuple[list[ProductRead], int | None, int | None, str | None]:
+        items, total, has_more = self.repo.list_page(
             query=query,
             category_id=category_id,
             price_min=price_min,
             price_max=price_max,
             skip=skip,
             limit=limit,
+            sort=sort,
+            total_mode=total_mode,
         )
-        total = self.repo.count(
+        next_skip = skip + limit if has_more else None
+        next_cursor = None
+        if has_more and sort != ProductSort.relevance:
+            next_cursor = self._encode_cursor(sort, items[-1])
+        return [ProductRead.model_validate(item) for item in items], total, next_skip, next_cursor
+
+    def count_products(
+        self,
+        query: str | None = None,
+        category_id: int | None = None,
+        price_min: float | None = None,
+        price_max: float | None = None,
+    ) -> int:
+        filters = _normalize_filters(query, category_id, price_min, price_max)
+        key = ("count", catalog_version.current, *filters)
+        return product_list_cache.get_or_set(
+            key,
+            lambda: self.repo.count(
+                query=filters[0],
+                category_id=filters[1],
+                price_min=filters[2],
+                price_max=filters[3],
+            ),
+        )
+
+    def product_facets(
+        self,
+        query: str | None = None,
+        category_id: int | None = None,
+        price_min: float | None = None,
+        price_max: float | None = None,
+    ) -> ProductFacets:
+        filters = _normalize_filters(query, category_id, price_min, price_max)
+        key = ("facets", catalog_version.current, *filters)
+        return product_list_cache.get_or_set(key, lambda: self._load_facets(*filters))
+
+    def _load_facets(
+        self,
+        query: str | None,
+        category_id: int | None,
+        price_min: float | None,
+        price_max: float | None,
+    ) -> ProductFacets:
+        edges = _settings.facet_price_edges
+        rows = self.repo.facet_counts(
+            edges,
             query=query,
             category_id=category_id,
             price_min=price_min,
             price_max=price_max,
         )
-        next_skip = skip + limit if skip + limit < total else None
-        return items, total, next_skip
+        total = 0
+        stock = {0: 0, 1: 0}
+        categories: list[CategoryFacet] = []
+        buckets = [0] * len(edges)
+        for facet, key, count in rows:
+            if facet == "total":
+                total = count
+            elif facet == "stock":
+                stock[int(key)] = count
+            elif facet == "category":
+                categories.append(CategoryFacet(category_id=key, count=count))
+            elif facet == "price":
+                buckets[int(key)] = count
+        return ProductFacets(
+            total=total,
+            in_stock=stock[1],
+            out_of_stock=stock[0],
+            categories=sorted(categories, key=lambda item: item.category_id),
+            price_buckets=[
+                PriceBucketFacet(
+                    min=edges[index],
+                    max=edges[index + 1] if index + 1 < len(edges) else None,
+                    count=count,
+                )
+                for index, count in enumerate(buckets)
+            ],
+        )
+
+    @staticmethod
+    def _encode_cursor(sort: ProductSort, product: Product) -> str:
+        keys, _descending = SORT_KEYS[sort]
+        values = [getattr(product, key.key) for key in keys]
+        return encode_cursor({"sort": sort.value, "keys": [
+            value.isoformat() if isinstance(value, datetime) else str(value) for value in values
+        ]})
+
+    @staticmethod
+    def _decode_cursor(sort: ProductSort | None, cursor: str) -> tuple[ProductSort, list]:
+        payload = decode_cursor(cursor)
+        try:
+            cursor_sort = ProductSort(payload.get("sort"))
+        except ValueError as exc:
+            raise ValueError("Invalid cursor") from exc
+        if sort is not None and sort != cursor_sort:
+            raise ValueError("Cursor does not match the requested sort")
+        if cursor_sort not in SORT_KEYS:
+            raise ValueError("Invalid cursor")
+        keys, _descending = SORT_KEYS[cursor_sort]
+        raw = payload.get("keys")
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError("Invalid cursor")
+        parsers = {"created_at": datetime.fromisoformat, "price": Decimal, "id": int}
+        try:
+            return cursor_sort, [parsers[key.key](value) for key, value in zip(keys, raw)]
+        except (ArithmeticError, TypeError, ValueError) as exc:
+            raise ValueError("Invalid cursor") from exc
 
     def get_product(self, product_id: int):
         product = self.repo.get(product_id)
         if not product:
             return None
-        return self.repo.increment_views(product)
+        view_counter.record(product.id)
+        trending.record_view(product.id)
+        return product
+
+    def get_payloads(self, product_ids: list[int]) -> list[bytes]:
+        """Serialized ProductRead for each id that exists, in the given order.
+
+        Cached payloads cost no SQL; the misses are loaded with one IN query.
+        """
+        version = catalog_version.current
+        payloads: dict[int, bytes] = {}
+        missing = []
+        for product_id in product_ids:
+            cached = product_payload_cache.get((version, product_id))
+            if cached is MISSING:
+                missing.append(product_id)
+            else:
+                payloads[product_id] = cached
+        if missing:
+            for product in self.repo.get_many(missing):
+                payload = ProductRead.model_validate(product).model_dump_json().encode()
+                product_payload_cache.set((version, product.id), payload)
+                payloads[product.id] = payload
+        return [payloads[product_id] for product_id in product_ids if product_id in payloads]
 
-    def create_product(self, payload: ProductCreate):
+    def create_product(self, payload: ProductCreate, background_tasks: BackgroundTasks):
         product = Product(
             name=payload.name,
             description=payload.description,
@@ -77,9 +326,12 @@ class ProductService:
             self.repo.set_images(created, payload.images)
         if payload.variants:
             self.repo.set_variants(created, [item.model_dump() for item in payload.variants])
-        return self.repo.get(created.id)
+        catalog_version.bump()
+        product = self.repo.get(created.id)
+        schedule_similar_refresh(background_tasks, [ProductDocument.from_product(product)])
+        return product
 
-    def update_product(self, product_id: int, payload: ProductUpdate):
+    def update_product(self, product_id: int, payload: ProductUpdate, background_tasks: BackgroundTasks):
         product = self.repo.get(product_id)
         if not product:
             return None
@@ -100,7 +352,11 @@ class ProductService:
             self.repo.set_images(updated, payload.images)
         if payload.variants is not None:
             self.repo.set_variants(updated, [item.model_dump() for item in payload.variants])
-        return self.repo.get(updated.id)
+        catalog_version.bump()
+        product = self.repo.get(updated.id)
+        if payload.name is not None or payload.description is not None or payload.category_id is not None:
+            schedule_similar_refresh(background_tasks, [ProductDocument.from_product(product)])
+        return product
 
     def delete_product(self, product_id: int) -> bool:
         product = self.repo.get(product_id)
@@ -121,4 +377,5 @@ class ProductService:
         )
 
         self.repo.delete(product)
+        catalog_version.bump()
         return True
\ No newline at end of file
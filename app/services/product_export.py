@@ -0,0 +1,106 @@
+import csv
+import io
+import zlib
+from collections.abc import Iterator
+from enum import Enum
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.product import Product
+from app.schemas.product import ProductRead
+
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "description",
+    "price",
+    "rating",
+    "category_id",
+    "category_name",
+    "stock_count",
+    "views_count",
+    "sold_count",
+    "created_at",
+    "images",
+    "variants",
+]
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+def _csv_line(product: Product) -> str:
+    out = io.StringIO()
+    # images/variants use the same url|url and name:price|name:price encoding as bulk import
+    csv.writer(out).writerow(
+        [
+            product.id,
+            product.name,
+            product.description,
+            product.price,
+            product.rating,
+            product.category_id,
+            product.category.name if product.category else "",
+            product.stock_count,
+            product.views_count,
+            product.sold_count,
+            product.created_at.isoformat() if product.created_at else "",
+            "|".join(image.url for image in product.images),
+            "|".join(f"{variant.name}:{variant.price}" for variant in product.variants),
+        ]
+    )
+    return out.getvalue()
+
+
+class ProductExportService:
+    """Streams the whole catalog with flat memory.
+
+    Products are read through a server-side cursor (``yield_per``); images, variants and
+    category are selectin-loaded once per partition and the partition is expunged from
+    the session after it has been written out.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 500):
+        self.db = db
+        self.batch_size = batch_size
+
+    def iter_chunks(self, fmt: ExportFormat) -> Iterator[str]:
+        if fmt == ExportFormat.csv:
+            out = io.StringIO()
+            csv.writer(out).writerow(CSV_COLUMNS)
+            yield out.getvalue()
+
+        stmt = (
+            select(Product)
+            .options(
+                selectinload(Product.images),
+                selectinload(Product.variants),
+                selectinload(Product.category),
+            )
+            .order_by(Product.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        for partition in self.db.scalars(stmt).partitions():
+            if fmt == ExportFormat.csv:
+                lines = [_csv_line(product) for product in partition]
+            else:
+                lines = [ProductRead.model_validate(product).model_dump_json() + "\n" for product in partition]
+            yield "".join(lines)
+            for product in partition:
+                self.db.expunge(product)
+
+    def iter_bytes(self, fmt: ExportFormat, gzip: bool = False) -> Iterator[bytes]:
+        if not gzip:
+            for chunk in self.iter_chunks(fmt):
+                yield chunk.encode("utf-8")
+            return
+
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in self.iter_chunks(fmt):
+            data = compressor.compress(chunk.encode("utf-8"))
+            if data:
+                yield data
+        yield compressor.flush()
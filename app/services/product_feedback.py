@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
+from app.repositories.paging import TotalMode
 from app.repositories.product import ProductRepository
-from app.repositories.product_feedback import ProductFeedbackRepository
+from app.repositories.product_feedback import STAR_COLUMNS, ProductFeedbackRepository
+from app.utils.cache import counters_version
+
+
+def _rating_stats(row: Row) -> dict:
+    return {
+        "product_id": row.product_id,
+        "average": row.rating_sum / row.rating_count if row.rating_count else 0.0,
+        "count": row.rating_count,
+        "histogram": {stars: getattr(row, column.key) for stars, column in STAR_COLUMNS.items()},
+    }
 
 
 class ProductFeedbackService:
@@ -13,50 +25,67 @@ class ProductFeedbackService:
         self.feedback = ProductFeedbackRepository(db)
 
     # Ratings
-    def upsert_rating(self, product_id: int, user_id: int, rating: int):
-        product = self.products.get(product_id)
-        if not product:
+    def upsert_rating(self, product_id: int, user_id: int, rating: int) -> dict | None:
+        stats = self.feedback.upsert_rating(product_id, user_id, rating)
+        if stats is None:
             return None
-        return self.feedback.upsert_rating(product, user_id, rating)
+        counters_version.bump()
+        return _rating_stats(stats)
 
     def delete_my_rating(self, product_id: int, user_id: int) -> bool | None:
-        product = self.products.get(product_id)
-        if not product:
+        if not self.products.exists(product_id):
             return None
-        return self.feedback.delete_rating(product, user_id)
+        deleted = self.feedback.delete_rating(product_id, user_id)
+        if deleted:
+            counters_version.bump()
+        return deleted
 
-    def get_rating_stats(self, product_id: int) -> tuple[float, int] | None:
-        product = self.products.get(product_id)
-        if not product:
-            return None
-        return self.feedback.get_rating_stats(product_id)
+    def get_rating_stats(self, product_id: int) -> dict | None:
+        # the stats row doubles as the existence check
+        stats = self.feedback.get_rating_stats(product_id)
+        return _rating_stats(stats) if stats is not None else None
+
+    def get_rating_stats_many(self, product_ids: list[int], user_id: int | None = None) -> list[dict]:
+        """Stats for each existing product among ``product_ids``; unknown ids are left out.
+
+        With a ``user_id`` each entry also carries that user's own rating, read with a
+        second IN query.
+        """
+        items = [_rating_stats(row) for row in self.feedback.rating_stats(product_ids)]
+        mine = self.feedback.user_ratings(user_id, product_ids) if user_id is not None else {}
+        for item in items:
+            item["my_rating"] = mine.get(item["product_id"])
+        return items
 
     def get_my_rating(self, product_id: int, user_id: int) -> int | None:
-        product = self.products.get(product_id)
-        if not product:
+        if not self.products.exists(product_id):
             return None
         existing = self.feedback.get_user_rating(product_id, user_id)
         return existing.rating if existing else None
 
     # Comments
     def add_comment(self, product_id: int, user_id: int, text: str):
-        product = self.products.get(product_id)
-        if not product:
+        if not self.products.exists(product_id):
             return None
         return self.feedback.create_comment(product_id, user_id, text)
 
-    def list_comments_paged(self, product_id: int, skip: int, limit: int):
-        product = self.products.get(product_id)
-        if not product:
+    def list_comments_paged(
+        self,
+        product_id: int,
+        skip: int,
+        limit: int,
+        total_mode: TotalMode = TotalMode.exact,
+    ):
+        if not self.products.exists(product_id):
             return None
-        items = self.feedback.list_comments(product_id, skip=skip, limit=limit)
-        total = self.feedback.count_comments(product_id)
-        next_skip = skip + limit if skip + limit < total else None
+        items, total, has_more = self.feedback.list_comments_page(
+            product_id, skip=skip, limit=limit, total_mode=total_mode
+        )
+        next_skip = skip + limit if has_more else None
         return items, total, next_skip
 
     def delete_comment(self, product_id: int, comment_id: int, current_user) -> bool | None:
-        product = self.products.get(product_id)
-        if not product:
+        if not self.products.exists(product_id):
             return None
 
         comment = self.feedback.get_comment(comment_id)
@@ -0,0 +1,244 @@
+import codecs
+import csv
+import json
+import logging
+from collections.abc import AsyncIterator
+from enum import Enum
+from typing import Any
+
+from fastapi import BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.product import Product, ProductImage, ProductVariant
+from app.schemas.product import ProductCreate, ProductImportError, ProductImportReport
+from app.services.similar_products import ProductDocument, schedule_similar_refresh
+from app.utils.cache import catalog_version
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: ImportFormat) -> AsyncIterator[str]:
+    """Split a streamed body into records without buffering the whole upload.
+
+    NDJSON records are lines. CSV records are lines too, except that a line ending
+    inside a quoted field is joined with the next one.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pending = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if fmt == ImportFormat.csv:
+                pending += line + "\n"
+                if pending.count('"') % 2:
+                    continue
+                line, pending = pending, ""
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    tail = pending + buffer
+    if tail.strip():
+        yield tail
+
+
+def parse_csv_row(header: list[str], record: str) -> dict[str, Any]:
+    values = next(csv.reader([record]))
+    row = {key: value.strip() for key, value in zip(header, values) if value.strip() != ""}
+    # images: url|url, variants: name:price|name:price
+    if "images" in row:
+        row["images"] = [url.strip() for url in row["images"].split("|") if url.strip()]
+    if "variants" in row:
+        variants = []
+        for item in row["variants"].split("|"):
+            name, sep, price = item.rpartition(":")
+            if not sep:
+                raise ValueError(f"Invalid variant {item!r}, expected name:price")
+            variants.append({"name": name.strip(), "price": price.strip()})
+        row["variants"] = variants
+    return row
+
+
+def column_error(payload: ProductCreate) -> str | None:
+    """What the database would reject in ``payload`` (other than the category), so the report can name the row."""
+    texts = [("name", payload.name, Product.name), ("description", payload.description, Product.description)]
+    texts += [("images", url, ProductImage.url) for url in payload.images]
+    texts += [("variants.name", variant.name, ProductVariant.name) for variant in payload.variants]
+    for field, value, column in texts:
+        if len(value) > column.type.length:
+            return f"{field}: at most {column.type.length} characters"
+        if "\x00" in value:
+            return f"{field}: must not contain NUL characters"
+    prices = [("price", payload.price, Product.price)]
+    prices += [("variants.price", variant.price, ProductVariant.price) for variant in payload.variants]
+    for field, value, column in prices:
+        # Numeric(precision, scale) holds less than 10 ** (precision - scale); NaN fails too
+        limit = 10 ** (column.type.precision - column.type.scale)
+        if not abs(value) < limit:
+            return f"{field}: must be less than {limit}"
+    if not -(2**31) <= payload.stock_count < 2**31:
+        return "stock_count: out of range"
+    return None
+
+
+def parse_ndjson_row(record: str) -> dict[str, Any]:
+    row = json.loads(record)
+    if not isinstance(row, dict):
+        raise ValueError("Each line must be a JSON object")
+    return row
+
+
+class ProductImportService:
+    """Chunked bulk loader for POST /products/bulk-import.
+
+    Each chunk is validated with ProductCreate and written in its own transaction with
+    three multi-row INSERTs (products with RETURNING id, then images and variants), so a
+    bad chunk never rolls back the chunks before it. Rows the database would reject are
+    caught before the insert; if a chunk still fails, its rows are retried one by one
+    so only the rows at fault are reported. Created products are folded into the
+    similar-products overlay after the response.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.category_names = dict(self.db.execute(select(Category.id, Category.name)).tuples().all())
+        self.report = ProductImportReport(received=0, created=0, failed=0, errors=[])
+        self.documents: list[ProductDocument] = []
+
+    def fail(self, row_number: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(ProductImportError(row=row_number, error=error))
+
+    def import_chunk(self, rows: list[tuple[int, dict[str, Any] | Exception]]) -> None:
+        valid: list[tuple[int, ProductCreate]] = []
+        for row_number, row in rows:
+            self.report.received += 1
+            if isinstance(row, Exception):
+                self.fail(row_number, str(row))
+                continue
+            try:
+                payload = ProductCreate.model_validate(row)
+            except ValidationError as exc:
+                self.fail(row_number, "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+                ))
+                continue
+            if payload.category_id not in self.category_names:
+                self.fail(row_number, f"Category not found: {payload.category_id}")
+                continue
+            error = column_error(payload)
+            if error:
+                self.fail(row_number, error)
+                continue
+            valid.append((row_number, payload))
+
+        if not valid or self._write(valid):
+            return
+        # the database rejected something the checks above let through; driver errors stay in the log
+        for row in valid:
+            if len(valid) == 1 or not self._write([row]):
+                self.fail(row[0], "Insert failed")
+
+    def _write(self, rows: list[tuple[int, ProductCreate]]) -> bool:
+        try:
+            product_ids = self._insert(payload for _row_number, payload in rows)
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            logger.exception("Product import insert failed for rows %d-%d", rows[0][0], rows[-1][0])
+            return False
+        self.report.created += len(rows)
+        for product_id, (_row_number, payload) in zip(product_ids, rows):
+            category = self.category_names[payload.category_id]
+            self.documents.append(ProductDocument(product_id, payload.name, payload.description or "", category))
+        return True
+
+    def finish(self, background_tasks: BackgroundTasks) -> ProductImportReport:
+        if self.report.created:
+            catalog_version.bump()
+        schedule_similar_refresh(background_tasks, self.documents)
+        return self.report
+
+    def _insert(self, payloads) -> list[int]:
+        payloads = list(payloads)
+        product_ids = self.db.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": payload.name,
+                    "description": payload.description,
+                    "price": payload.price,
+                    "rating": payload.rating,
+                    "category_id": payload.category_id,
+                    "stock_count": payload.stock_count,
+                    "views_count": 0,
+                    "sold_count": 0,
+                }
+                for payload in payloads
+            ],
+        ).all()
+
+        images = [
+            {"product_id": product_id, "url": url}
+            for product_id, payload in zip(product_ids, payloads)
+            for url in payload.images
+        ]
+        if images:
+            self.db.execute(insert(ProductImage), images)
+
+        variants = [
+            {"product_id": product_id, "name": variant.name, "price": variant.price}
+            for product_id, payload in zip(product_ids, payloads)
+            for variant in payload.variants
+        ]
+        if variants:
+            self.db.execute(insert(ProductVariant), variants)
+        return product_ids
+
+
+async def import_products(
+    db: Session,
+    chunks: AsyncIterator[bytes],
+    fmt: ImportFormat,
+    chunk_size: int,
+    background_tasks: BackgroundTasks,
+) -> ProductImportReport:
+    service = await run_in_threadpool(ProductImportService, db)
+    header: list[str] | None = None
+    row_number = 0
+    batch: list[tuple[int, dict[str, Any] | Exception]] = []
+
+    async for record in iter_records(chunks, fmt):
+        if not record.strip():
+            continue
+        if fmt == ImportFormat.csv and header is None:
+            header = [column.strip().lower() for column in next(csv.reader([record]))]
+            continue
+        row_number += 1
+        try:
+            row: dict[str, Any] | Exception = (
+                parse_csv_row(header, record) if fmt == ImportFormat.csv else parse_ndjson_row(record)
+            )
+        except (ValueError, csv.Error) as exc:
+            row = exc
+        batch.append((row_number, row))
+        if len(batch) >= chunk_size:
+            await run_in_threadpool(service.import_chunk, batch)
+            batch = []
+
+    if batch:
+        await run_in_threadpool(service.import_chunk, batch)
+    return service.finish(background_tasks)
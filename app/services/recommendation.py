@@ -1,27 +1,45 @@
-from sqlalchemy import desc, select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 
-from app.models.product import Product
+from app.core.config import get_settings
+from app.repositories.recommendation import UserRecommendationRepository
+from app.services.bought_together import bought_together
+from app.services.leaderboard import LeaderboardMetric, leaderboards
+from app.services.product import ProductService
+from app.services.similar_products import similar_products
+from app.services.trending import TrendingWindow, trending
+from app.services.user_recommendations import user_recommendation_cache
+
+_settings = get_settings()
 
 
 class RecommendationService:
     def __init__(self, db: Session):
         self.db = db
 
-    def most_viewed(self, limit: int = 10):
-        stmt = (
-            select(Product)
-            .order_by(desc(Product.views_count))
-            .limit(limit)
-            .options(selectinload(Product.images), selectinload(Product.category))
-        )
-        return list(self.db.scalars(stmt).all())
-
-    def most_sold(self, limit: int = 10):
-        stmt = (
-            select(Product)
-            .order_by(desc(Product.sold_count))
-            .limit(limit)
-            .options(selectinload(Product.images), selectinload(Product.category))
+    def most_viewed(self, limit: int = 10, category_id: int | None = None) -> bytes:
+        return leaderboards.top(self.db, LeaderboardMetric.views, category_id, limit)
+
+    def most_sold(self, limit: int = 10, category_id: int | None = None) -> bytes:
+        return leaderboards.top(self.db, LeaderboardMetric.sold, category_id, limit)
+
+    def bought_with(self, product_id: int, limit: int = 10) -> bytes:
+        # neighbour ids come from the in-memory index, products from the payload cache
+        neighbors = bought_together.lookup(product_id, limit)
+        return b"[" + b",".join(ProductService(self.db).get_payloads(neighbors)) + b"]"
+
+    def similar(self, product_id: int, limit: int = 10) -> bytes:
+        neighbors = similar_products.lookup(product_id, limit)
+        return b"[" + b",".join(ProductService(self.db).get_payloads(neighbors)) + b"]"
+
+    def for_user(self, user_id: int, limit: int = 10) -> bytes:
+        """The user's precomputed list; users the last build had no history for get most-sold."""
+        product_ids = user_recommendation_cache.get_or_set(
+            user_id,
+            lambda: UserRecommendationRepository(self.db).product_ids(user_id, _settings.user_recommendations_top_n),
         )
-        return list(self.db.scalars(stmt).all())
+        if not product_ids:
+            return self.most_sold(limit)
+        return b"[" + b",".join(ProductService(self.db).get_payloads(product_ids[:limit])) + b"]"
+
+    def trending(self, window: TrendingWindow, limit: int = 10) -> bytes:
+        return b"[" + b",".join(ProductService(self.db).get_payloads(trending.top(window, limit))) + b"]"
@@ -0,0 +1,390 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from fastapi import BackgroundTasks
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w{2,}", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class ProductDocument:
+    product_id: int
+    name: str
+    description: str
+    category: str
+
+    @classmethod
+    def from_product(cls, product) -> "ProductDocument":
+        category = product.category.name if product.category else ""
+        return cls(product.id, product.name, product.description or "", category)
+
+
+def tokenize(doc: ProductDocument) -> list[str]:
+    name = _TOKEN.findall(doc.name.lower())
+    description = _TOKEN.findall((doc.description or "").lower())
+    # category words are kept apart from free text so "dress" in a description and the
+    # "Dresses" category are different features; the name counts twice
+    category = ["c:" + token for token in _TOKEN.findall((doc.category or "").lower())]
+    return name + name + description + category
+
+
+@dataclass(frozen=True)
+class SparseVector:
+    indices: np.ndarray  # sorted columns
+    data: np.ndarray
+
+    def dot(self, other: "SparseVector") -> float:
+        _common, mine, theirs = np.intersect1d(self.indices, other.indices, assume_unique=True, return_indices=True)
+        return float(self.data[mine] @ other.data[theirs])
+
+
+@dataclass(frozen=True)
+class SparseRows:
+    """A float32 matrix in CSR layout.
+
+    Row ``i`` holds ``data[indptr[i]:indptr[i + 1]]`` at the (sorted) columns
+    ``indices[indptr[i]:indptr[i + 1]]``.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_columns: int
+
+    @classmethod
+    def empty(cls, n_columns: int = 0) -> "SparseRows":
+        return cls(np.zeros(1, np.int64), np.empty(0, np.int64), np.empty(0, np.float32), n_columns)
+
+    @property
+    def n_rows(self) -> int:
+        return self.indptr.size - 1
+
+    def row(self, row: int) -> SparseVector:
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        return SparseVector(self.indices[start:stop], self.data[start:stop])
+
+    def transpose(self) -> "SparseRows":
+        """The same matrix column by column, e.g. the rows containing each token."""
+        order = np.argsort(self.indices, kind="stable")
+        rows = np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+        counts = np.bincount(self.indices, minlength=self.n_columns)
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return SparseRows(indptr, rows[order], self.data[order], self.n_rows)
+
+    def gather(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(entry number in ``rows``, column, value) for every stored value of ``rows``."""
+        counts = self.indptr[rows + 1] - self.indptr[rows]
+        positions = np.repeat(self.indptr[rows], counts) + (
+            np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        )
+        return np.repeat(np.arange(rows.size), counts), self.indices[positions], self.data[positions]
+
+
+class TfidfVectorizer:
+    """Sublinear TF-IDF, optionally over a vocabulary capped at ``max_features`` by document frequency."""
+
+    def __init__(self, vocabulary: list[str], idf: np.ndarray):
+        self.vocabulary = vocabulary
+        self.idf = idf.astype(np.float32)
+        self.columns = {token: column for column, token in enumerate(vocabulary)}
+
+    @classmethod
+    def fit(cls, docs: list[list[str]], max_features: int | None = None) -> "TfidfVectorizer":
+        df = Counter(token for tokens in docs for token in set(tokens))
+        # most frequent first, ties by token for a stable vocabulary
+        vocabulary = sorted(df, key=lambda token: (-df[token], token))[:max_features]
+        counts = np.array([df[token] for token in vocabulary], dtype=np.float64)
+        idf = np.log((1 + len(docs)) / (1 + counts)) + 1
+        return cls(vocabulary, idf)
+
+    def transform(self, docs: list[list[str]]) -> SparseRows:
+        """L2-normalized rows; unknown tokens are ignored."""
+        indptr, indices, data = [0], [], []
+        for tokens in docs:
+            counts = Counter(token for token in tokens if token in self.columns)
+            columns = np.fromiter((self.columns[token] for token in counts), dtype=np.int64, count=len(counts))
+            weights = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+            weights *= self.idf[columns]
+            norm = np.linalg.norm(weights)
+            if norm > 0:
+                weights /= norm
+            order = np.argsort(columns)
+            indices.append(columns[order])
+            data.append(weights[order])
+            indptr.append(indptr[-1] + columns.size)
+        if not docs:
+            return SparseRows.empty(len(self.vocabulary))
+        return SparseRows(
+            np.array(indptr, dtype=np.int64),
+            np.concatenate(indices),
+            np.concatenate(data).astype(np.float32),
+            len(self.vocabulary),
+        )
+
+
+def top_k_neighbors(vectors: SparseRows, top_k: int, block_size: int = 256) -> tuple[np.ndarray, np.ndarray]:
+    """Cosine top-K for every row, ``block_size`` rows at a time.
+
+    Each block is scored against the rows sharing a token with it through the token
+    postings, so peak memory is one ``block_size x n`` score block. Returns row indices
+    (-1 padded) and scores, best first.
+    """
+    n = vectors.n_rows
+    k = min(top_k, max(n - 1, 0))
+    neighbors = np.full((n, top_k), -1, dtype=np.int64)
+    scores = np.zeros((n, top_k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+    postings = vectors.transpose()
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        # every (row, token) of the block expanded into the token's postings, summed per (row, other row)
+        entries, tokens, weights = vectors.gather(np.arange(start, stop))
+        hits, others, other_weights = postings.gather(tokens)
+        block = np.bincount(
+            entries[hits] * n + others,
+            weights=weights[hits] * other_weights,
+            minlength=(stop - start) * n,
+        ).reshape(stop - start, n)
+        rows = np.arange(stop - start)
+        block[rows, start + rows] = -np.inf  # never your own neighbour
+        best = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(block, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        neighbors[start:stop, :k] = np.take_along_axis(best, order, axis=1)
+        scores[start:stop, :k] = np.take_along_axis(best_scores, order, axis=1)
+    # drop zero-similarity "neighbours" (no shared features)
+    neighbors[scores <= 0] = -1
+    return neighbors, scores
+
+
+_SPARSE_PARTS = ("indptr", "indices", "data")
+
+
+@dataclass(frozen=True)
+class SimilarityIndex:
+    product_ids: np.ndarray
+    vectors: SparseRows
+    postings: SparseRows  # vectors by token: the rows containing each token
+    neighbors: np.ndarray  # product ids, -1 padded
+    scores: np.ndarray
+    vectorizer: TfidfVectorizer
+    rows: dict[int, int]
+
+    @classmethod
+    def build(
+        cls,
+        docs: Iterable[ProductDocument],
+        top_k: int,
+        max_features: int | None = None,
+        block_size: int = 256,
+    ) -> "SimilarityIndex":
+        docs = list(docs)
+        tokens = [tokenize(doc) for doc in docs]
+        vectorizer = TfidfVectorizer.fit(tokens, max_features)
+        vectors = vectorizer.transform(tokens)
+        product_ids = np.array([doc.product_id for doc in docs], dtype=np.int64)
+        neighbor_rows, scores = top_k_neighbors(vectors, top_k, block_size)
+        neighbors = np.where(neighbor_rows >= 0, product_ids[np.maximum(neighbor_rows, 0)], -1)
+        return cls.from_arrays(product_ids, vectors, vectors.transpose(), neighbors, scores, vectorizer)
+
+    @classmethod
+    def from_arrays(cls, product_ids, vectors, postings, neighbors, scores, vectorizer) -> "SimilarityIndex":
+        rows = {int(product_id): row for row, product_id in enumerate(product_ids)}
+        return cls(product_ids, vectors, postings, neighbors, scores, vectorizer, rows)
+
+    @classmethod
+    def empty(cls, top_k: int) -> "SimilarityIndex":
+        vectorizer = TfidfVectorizer([], np.empty(0, np.float32))
+        return cls.from_arrays(
+            np.empty(0, np.int64),
+            SparseRows.empty(),
+            SparseRows.empty(),
+            np.empty((0, top_k), np.int64),
+            np.empty((0, top_k), np.float32),
+            vectorizer,
+        )
+
+    def similarities(self, vector: SparseVector) -> np.ndarray:
+        """Cosine of ``vector`` with every row, touching only the rows that share a token."""
+        hits, others, weights = self.postings.gather(vector.indices)
+        return np.bincount(others, weights=vector.data[hits] * weights, minlength=self.product_ids.size)
+
+    def save(self, directory: str | os.PathLike) -> Path:
+        """Write a new build next to ``directory/current`` and repoint the symlink atomically."""
+        # absolute, so the cleanup below compares like with like against current.resolve()
+        directory = Path(directory).resolve()
+        build = directory / f"build-{time.time_ns()}"
+        build.mkdir(parents=True)
+        for name in ("product_ids", "neighbors", "scores"):
+            np.save(build / f"{name}.npy", getattr(self, name))
+        for name in ("vectors", "postings"):
+            for part in _SPARSE_PARTS:
+                np.save(build / f"{name}_{part}.npy", getattr(getattr(self, name), part))
+        np.save(build / "idf.npy", self.vectorizer.idf)
+        (build / "vocabulary.json").write_text(json.dumps(self.vectorizer.vocabulary), encoding="utf-8")
+
+        current = directory / "current"
+        link = directory / f".current-{os.getpid()}"
+        link.unlink(missing_ok=True)
+        link.symlink_to(build.name)
+        previous = current.resolve() if current.is_symlink() else None
+        os.replace(link, current)
+        # keep the build that was current until now for readers that still map it
+        for old in directory.glob("build-*"):
+            if old not in (build, previous):
+                shutil.rmtree(old, ignore_errors=True)
+        return build
+
+    @classmethod
+    def load(cls, directory: str | os.PathLike) -> "SimilarityIndex":
+        # memory-mapped: every worker shares the page cache instead of a private copy
+        build = (Path(directory) / "current").resolve()
+
+        def array(name: str) -> np.ndarray:
+            return np.load(build / f"{name}.npy", mmap_mode="r")
+
+        vocabulary = json.loads((build / "vocabulary.json").read_text(encoding="utf-8"))
+        vectorizer = TfidfVectorizer(vocabulary, np.load(build / "idf.npy"))
+        product_ids = array("product_ids")
+        vectors = SparseRows(*(array(f"vectors_{part}") for part in _SPARSE_PARTS), len(vocabulary))
+        postings = SparseRows(*(array(f"postings_{part}") for part in _SPARSE_PARTS), product_ids.size)
+        return cls.from_arrays(product_ids, vectors, postings, array("neighbors"), array("scores"), vectorizer)
+
+
+@dataclass
+class _Pending:
+    vector: SparseVector
+    neighbors: list[tuple[float, int]]  # against the built index only
+
+
+class SimilarProducts:
+    """Serves "similar products" from the built index plus in-memory incremental changes.
+
+    Products created or edited since the last build are vectorized with the built
+    vocabulary and kept in a small overlay. Lookups merge the built neighbours with
+    scores against the overlay, so new and changed products show up immediately; the
+    overlay is dropped when a rebuilt index is picked up.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        top_k: int,
+        check_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.directory = Path(directory)
+        self.top_k = top_k
+        self.check_interval = check_interval
+        self.clock = clock
+        self.index = SimilarityIndex.empty(top_k)
+        self.version = 0
+        self._pending: dict[int, _Pending] = {}
+        self._build: Path | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def reload(self, force: bool = False) -> bool:
+        with self._lock:
+            self._next_check = self.clock() + self.check_interval
+            current = self.directory / "current"
+            if not current.exists():
+                return False
+            build = current.resolve()
+            if not force and build == self._build:
+                return False
+            self.index = SimilarityIndex.load(self.directory)
+            self._pending = {}
+            self._build = build
+            self.version += 1
+            return True
+
+    def upsert(self, doc: ProductDocument) -> None:
+        """Fold a created/updated product into the overlay (no-op before the first build)."""
+        if self.clock() >= self._next_check:
+            self.reload()
+        index = self.index
+        if not index.vectorizer.vocabulary:
+            return
+        vector = index.vectorizer.transform([tokenize(doc)]).row(0)
+        scores = index.similarities(vector)
+        row = index.rows.get(doc.product_id)
+        if row is not None:
+            scores[row] = -np.inf
+        k = min(self.top_k, scores.size)
+        best = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, np.int64)
+        neighbors = [(float(scores[i]), int(index.product_ids[i])) for i in best if scores[i] > 0]
+        with self._lock:
+            self._pending[doc.product_id] = _Pending(vector, neighbors)
+            self.version += 1
+
+    def lookup(self, product_id: int, limit: int) -> list[int]:
+        if self.clock() >= self._next_check:
+            self.reload()
+        index, pending = self.index, dict(self._pending)
+
+        if product_id in pending:
+            vector = pending[product_id].vector
+            candidates = list(pending[product_id].neighbors)
+        elif product_id in index.rows:
+            row = index.rows[product_id]
+            vector = index.vectors.row(row)
+            candidates = [
+                (float(score), int(neighbor))
+                for neighbor, score in zip(index.neighbors[row], index.scores[row])
+                if neighbor >= 0
+            ]
+        else:
+            return []
+
+        # built scores of products that changed since the build are stale
+        candidates = [(score, pid) for score, pid in candidates if pid not in pending]
+        for other_id, other in pending.items():
+            if other_id != product_id:
+                score = other.vector.dot(vector)
+                if score > 0:
+                    candidates.append((score, other_id))
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        return [pid for _score, pid in candidates[:limit]]
+
+
+def refresh_similar(docs: list[ProductDocument]) -> None:
+    """Background task after product writes: fold them into the overlay, never raising."""
+    for done, doc in enumerate(docs):
+        try:
+            similar_products.upsert(doc)
+        except Exception:
+            # the next index build picks up whatever is skipped here
+            skipped = len(docs) - done - 1
+            logger.exception("Failed to refresh similar products for product %s, %d skipped", doc.product_id, skipped)
+            return
+
+
+def schedule_similar_refresh(background_tasks: BackgroundTasks, docs: list[ProductDocument]) -> None:
+    """Every product create/update path schedules its overlay refresh here, to run after the response."""
+    if docs:
+        background_tasks.add_task(refresh_similar, docs)
+
+
+_settings = get_settings()
+
+similar_products = SimilarProducts(
+    _settings.similar_products_index_dir,
+    top_k=_settings.similar_products_top_k,
+    check_interval=_settings.similar_products_reload_seconds,
+)
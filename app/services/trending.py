@@ -0,0 +1,170 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Mapping
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TrendingWindow(str, Enum):
+    hour = "1h"
+    day = "24h"
+    week = "7d"
+
+
+WINDOW_SECONDS = {
+    TrendingWindow.hour: 3600,
+    TrendingWindow.day: 24 * 3600,
+    TrendingWindow.week: 7 * 24 * 3600,
+}
+
+# forward-decayed weights grow as e^(elapsed / window); rebase before they get large
+_REBASE_EXPONENT = 50.0
+
+
+class DecayedScores:
+    """Exponentially decayed event scores for one window, with an exact top-``size``.
+
+    Uses forward decay: an event at time t adds ``weight * e^((t - landmark) / window)``,
+    so stored scores never have to be decayed in place. Every score would be divided by
+    the same factor at read time, so the ranking is just the ranking of stored values.
+    Stored values only ever grow, which keeps an insertion-only top-``size`` exact: a
+    product outside it can only enter by passing the smallest member. Recording and
+    ranking therefore never look at more than ``size`` products. Scores live in a flat
+    float64 array indexed by product id.
+    """
+
+    def __init__(self, window_seconds: float, size: int, landmark: float):
+        self.window_seconds = window_seconds
+        self.size = size
+        self.landmark = landmark
+        self.scores = np.zeros(1024, dtype=np.float64)
+        self.top: dict[int, float] = {}
+        self._floor = 0.0
+
+    def add(self, product_id: int, weight: float, now: float) -> None:
+        exponent = (now - self.landmark) / self.window_seconds
+        if exponent > _REBASE_EXPONENT:
+            self._rebase(now)
+            exponent = 0.0
+        if product_id >= self.scores.size:
+            grown = np.zeros(max(self.scores.size * 2, product_id + 1), dtype=np.float64)
+            grown[: self.scores.size] = self.scores
+            self.scores = grown
+        value = self.scores[product_id] + weight * math.exp(exponent)
+        self.scores[product_id] = value
+
+        if product_id in self.top or len(self.top) < self.size:
+            self.top[product_id] = value
+        elif value > self._floor:
+            # the floor may be stale-low (members only grow), so check the real minimum
+            weakest = min(self.top, key=self.top.__getitem__)
+            if value > self.top[weakest]:
+                del self.top[weakest]
+                self.top[product_id] = value
+            self._floor = min(self.top.values())
+
+    def ranked(self, limit: int) -> list[int]:
+        return [pid for pid, _value in sorted(self.top.items(), key=lambda item: (-item[1], item[0]))[:limit]]
+
+    def _rebase(self, now: float) -> None:
+        factor = math.exp(-(now - self.landmark) / self.window_seconds)
+        self.scores *= factor
+        self.top = {pid: value * factor for pid, value in self.top.items()}
+        self._floor *= factor
+        self.landmark = now
+
+    def restore(self, scores: np.ndarray, landmark: float) -> None:
+        self.scores = np.array(scores, dtype=np.float64)
+        self.landmark = landmark
+        nonzero = np.flatnonzero(self.scores)
+        if nonzero.size > self.size:
+            nonzero = nonzero[np.argpartition(-self.scores[nonzero], self.size - 1)[: self.size]]
+        self.top = {int(pid): float(self.scores[pid]) for pid in nonzero}
+        self._floor = min(self.top.values(), default=0.0)
+
+
+class Trending:
+    """Trending products per window from view and sale events, kept in memory.
+
+    Each worker scores the events it sees itself; behind a load balancer every worker
+    sees a similar sample of traffic, so their rankings agree closely. With
+    ``snapshot_path`` set the scores are saved on shutdown and restored on startup.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        view_weight: float,
+        sale_weight: float,
+        snapshot_path: str | os.PathLike | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.view_weight = view_weight
+        self.sale_weight = sale_weight
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.clock = clock
+        now = clock()
+        self.windows = {window: DecayedScores(seconds, size, now) for window, seconds in WINDOW_SECONDS.items()}
+        self._lock = threading.Lock()
+
+    def record_view(self, product_id: int) -> None:
+        self._record(product_id, self.view_weight)
+
+    def record_sales(self, quantities: Mapping[int, int]) -> None:
+        for product_id, quantity in quantities.items():
+            self._record(product_id, self.sale_weight * quantity)
+
+    def _record(self, product_id: int, weight: float) -> None:
+        now = self.clock()
+        with self._lock:
+            for scores in self.windows.values():
+                scores.add(product_id, weight, now)
+
+    def top(self, window: TrendingWindow, limit: int) -> list[int]:
+        with self._lock:
+            return self.windows[window].ranked(limit)
+
+    def save(self) -> None:
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            arrays = {}
+            for window, scores in self.windows.items():
+                arrays[f"scores_{window.name}"] = scores.scores.copy()
+                arrays[f"landmark_{window.name}"] = np.float64(scores.landmark)
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp, self.snapshot_path)
+
+    def load(self) -> bool:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        try:
+            with np.load(self.snapshot_path) as data, self._lock:
+                for window, scores in self.windows.items():
+                    scores.restore(data[f"scores_{window.name}"], float(data[f"landmark_{window.name}"]))
+        except Exception:
+            logger.exception("Failed to restore trending scores from %s", self.snapshot_path)
+            return False
+        return True
+
+
+_settings = get_settings()
+
+trending = Trending(
+    size=_settings.trending_size,
+    view_weight=_settings.trending_view_weight,
+    sale_weight=_settings.trending_sale_weight,
+    snapshot_path=_settings.trending_snapshot_path,
+)
@@ -0,0 +1,130 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.bought_together import CoOccurrenceIndex, CoOccurrenceScore, build_index
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class UserTopN:
+    """Parallel arrays, one entry per recommendation, sorted by (user_id, rank)."""
+
+    user_ids: np.ndarray
+    ranks: np.ndarray
+    product_ids: np.ndarray
+    scores: np.ndarray
+
+    def rows(self) -> Iterator[dict]:
+        for user_id, rank, product_id, score in zip(
+            self.user_ids.tolist(), self.ranks.tolist(), self.product_ids.tolist(), self.scores.tolist()
+        ):
+            yield {"user_id": user_id, "rank": rank, "product_id": product_id, "score": score}
+
+
+def item_neighbors(
+    user_ids: np.ndarray,
+    product_ids: np.ndarray,
+    neighbors: int = 50,
+    min_support: int = 2,
+    max_history: int = 200,
+) -> CoOccurrenceIndex:
+    """Item-item cosine neighbours over user histories (each user is one "basket")."""
+    return build_index(
+        user_ids,
+        product_ids,
+        top_k=neighbors,
+        score=CoOccurrenceScore.cosine,
+        min_support=min_support,
+        max_basket=max_history,
+    )
+
+
+def score_users(
+    user_ids: np.ndarray,
+    product_ids: np.ndarray,
+    index: CoOccurrenceIndex,
+    top_n: int = 50,
+    seen_user_ids: np.ndarray | None = None,
+    seen_product_ids: np.ndarray | None = None,
+    chunk_users: int = 20_000,
+) -> UserTopN:
+    """Item-based collaborative filtering: top-``top_n`` unseen products per user.
+
+    A candidate's score is the sum of its similarities to the products in the user's
+    history. ``seen_*`` are extra (user, product) pairs never to recommend, e.g. low
+    ratings; the history itself is always excluded. Users are scored ``chunk_users`` at
+    a time to bound the size of the expanded candidate arrays.
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    seen_users = np.concatenate([user_ids, np.asarray(seen_user_ids if seen_user_ids is not None else [], np.int64)])
+    seen_products = np.concatenate(
+        [product_ids, np.asarray(seen_product_ids if seen_product_ids is not None else [], np.int64)]
+    )
+    parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    if user_ids.size == 0 or index.product_ids.size == 0:
+        return _top_n_result(parts, top_n)
+
+    # distinct history lines whose product has neighbours, as rows of the index
+    user_ids, product_ids = np.unique(np.stack([user_ids, product_ids], axis=1), axis=0).T
+    rows = np.searchsorted(index.product_ids, product_ids)
+    rows = np.minimum(rows, index.product_ids.size - 1)
+    known = index.product_ids[rows] == product_ids
+    users, rows = user_ids[known], rows[known]
+
+    seen_order = np.argsort(seen_users, kind="stable")
+    seen_users, seen_products = seen_users[seen_order], seen_products[seen_order]
+    span = int(max(index.neighbors.max(initial=0), seen_products.max(initial=0))) + 1
+
+    distinct = np.unique(users)
+    for start in range(0, distinct.size, chunk_users):
+        chunk = distinct[start : start + chunk_users]
+        lo, hi = np.searchsorted(users, chunk[0]), np.searchsorted(users, chunk[-1], side="right")
+        line_users, line_rows = users[lo:hi], rows[lo:hi]
+
+        # expand every history line into its product's neighbour list, then sum per (user, product)
+        counts = index.indptr[line_rows + 1] - index.indptr[line_rows]
+        positions = np.repeat(index.indptr[line_rows], counts) + (
+            np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        )
+        user_codes = np.searchsorted(chunk, np.repeat(line_users, counts))
+        keys, inverse = np.unique(user_codes * span + index.neighbors[positions], return_inverse=True)
+        scores = np.bincount(inverse, weights=index.scores[positions])
+
+        lo, hi = np.searchsorted(seen_users, chunk[0]), np.searchsorted(seen_users, chunk[-1], side="right")
+        seen_codes = np.searchsorted(chunk, seen_users[lo:hi])
+        in_chunk = chunk[np.minimum(seen_codes, chunk.size - 1)] == seen_users[lo:hi]
+        seen_keys = seen_codes[in_chunk] * span + seen_products[lo:hi][in_chunk]
+        fresh = ~np.isin(keys, seen_keys)
+        keys, scores = keys[fresh], scores[fresh]
+        parts.append((chunk[keys // span], keys % span, scores))
+
+    return _top_n_result(parts, top_n)
+
+
+def _top_n_result(parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]], top_n: int) -> UserTopN:
+    if not parts:
+        empty = np.empty(0, np.int64)
+        return UserTopN(empty, empty, empty, np.empty(0, np.float32))
+    users = np.concatenate([part[0] for part in parts])
+    products = np.concatenate([part[1] for part in parts])
+    scores = np.concatenate([part[2] for part in parts])
+    # best ``top_n`` per user: sort by (user, -score, product), keep the first rows of each run
+    order = np.lexsort((products, -scores, users))
+    users, products, scores = users[order], products[order], scores[order]
+    _distinct, run_starts, run_sizes = np.unique(users, return_index=True, return_counts=True)
+    ranks = np.arange(users.size) - np.repeat(run_starts, run_sizes)
+    top = ranks < top_n
+    return UserTopN(users[top], ranks[top], products[top], scores[top].astype(np.float32))
+
+
+_settings = get_settings()
+
+# per-user top-N product ids read from user_recommendations, for recently active users
+user_recommendation_cache = TTLCache(
+    maxsize=_settings.user_recommendations_cache_max_entries,
+    ttl=_settings.user_recommendations_cache_ttl_seconds,
+)
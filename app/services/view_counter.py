@@ -0,0 +1,97 @@
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.repositories.product import ProductRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Write-behind buffer for products.views_count.
+
+    GET /products/{id} only records the view in memory; a background thread folds the
+    buffered increments into one batched UPDATE every ``interval`` seconds, or sooner once
+    ``max_pending`` views are waiting. Whatever is left is flushed on shutdown.
+    """
+
+    def __init__(self, session_factory: sessionmaker, interval: float, max_pending: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: Counter[int] = Counter()
+        self._pending_events = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, product_id: int, count: int = 1) -> None:
+        with self._lock:
+            self._pending[product_id] += count
+            self._pending_events += count
+            if self._pending_events >= self.max_pending:
+                self._wakeup.set()
+
+    def pending(self) -> dict[int, int]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._pending_events = 0
+        if not batch:
+            return 0
+        try:
+            with self.session_factory() as db:
+                ProductRepository(db).add_views(batch)
+        except Exception:
+            # keep the counts for the next round instead of losing them
+            with self._lock:
+                self._pending.update(batch)
+                self._pending_events += sum(batch.values())
+            raise
+        return len(batch)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="view-counter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush product views on shutdown")
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush product views")
+
+
+_settings = get_settings()
+
+view_counter = ViewCounter(
+    SessionLocal,
+    interval=_settings.view_flush_interval_seconds,
+    max_pending=_settings.view_flush_max_events,
+)
@@ -0,0 +1,78 @@
+import hashlib
+import secrets
+from collections.abc import Callable, Hashable
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.config import get_settings
+
+# Generation counters restart at 0 with the process; mixing in a per-boot id keeps an
+# ETag issued before a restart from matching different content afterwards.
+_BOOT_ID = secrets.token_hex(8)
+
+
+def make_etag(*parts: Hashable) -> str:
+    raw = "|".join(str(part) for part in (_BOOT_ID, *parts)).encode("utf-8")
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+class ConditionalGet:
+    """Dependency adding ETag/Cache-Control to a public GET route.
+
+    The ETag is derived from ``version()`` plus the request path and query string, so it
+    is known before any database work; a matching If-None-Match short-circuits the
+    route with 304 Not Modified and nothing is loaded or serialized.
+    """
+
+    def __init__(
+        self,
+        version: Callable[[], Hashable],
+        max_age: int | None = None,
+        stale_while_revalidate: int | None = None,
+        on_not_modified: Callable[[Request], None] | None = None,
+    ):
+        settings = get_settings()
+        self.version = version
+        self.max_age = settings.http_cache_max_age_seconds if max_age is None else max_age
+        self.stale_while_revalidate = (
+            settings.http_cache_stale_while_revalidate_seconds
+            if stale_while_revalidate is None
+            else stale_while_revalidate
+        )
+        self.on_not_modified = on_not_modified
+
+    def __call__(self, request: Request, response: Response) -> str:
+        query = sorted(request.query_params.multi_items())
+        etag = make_etag(self.version(), request.url.path, query)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": (
+                f"public, max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+            ),
+        }
+        if etag_matches(request, etag):
+            if self.on_not_modified is not None:
+                self.on_not_modified(request)
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Return already-serialized JSON, keeping the headers dependencies put on ``response``.
+
+    FastAPI drops the injected response's headers when a route returns its own Response.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
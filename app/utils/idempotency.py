@@ -0,0 +1,105 @@
+import threading
+from collections.abc import Hashable
+from typing import Any
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.core.config import get_settings
+from app.core.deps import get_current_user
+from app.utils.cache import MISSING, TTLCache
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore:
+    """Responses of completed Idempotency-Key requests, kept in-process for ``ttl`` seconds.
+
+    Keys that are still being handled are tracked separately, so a retry that races the
+    original request gets 409 instead of running the handler a second time.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.responses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def begin(self, key: Hashable) -> Any:
+        """Return the stored response for ``key``, or MISSING after claiming it."""
+        with self._lock:
+            stored = self.responses.get(key)
+            if stored is not MISSING:
+                return stored
+            if key in self._in_flight:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is already in progress",
+                )
+            self._in_flight.add(key)
+            return MISSING
+
+    def finish(self, key: Hashable, response: Any = MISSING) -> None:
+        """Release ``key``; a response is stored only if the handler succeeded."""
+        with self._lock:
+            if response is not MISSING:
+                self.responses.set(key, response)
+            self._in_flight.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.responses.clear()
+            self._in_flight.clear()
+
+
+class IdempotentRequest:
+    def __init__(self, store: IdempotencyStore, key: Hashable | None = None):
+        self.store = store
+        self.key = key
+        self.replay: Any = MISSING
+        self.saved = False
+
+    def save(self, response: Any) -> Any:
+        """Remember ``response`` for retries with the same key and return it."""
+        if self.key is not None:
+            self.store.finish(self.key, response)
+            self.saved = True
+        return response
+
+
+class Idempotency:
+    """Dependency honouring the Idempotency-Key header on a mutating route.
+
+    Keys are scoped to the caller, method and path. The route returns ``replay`` when it
+    is set and passes its result through ``save`` otherwise; a replay carries an
+    ``Idempotent-Replayed: true`` header. Failed requests (any exception) store nothing,
+    so the client may retry them with the same key.
+    """
+
+    def __init__(self, store: IdempotencyStore | None = None):
+        self.store = store or idempotency_store
+
+    def __call__(self, request: Request, response: Response, current_user=Depends(get_current_user)):
+        key = request.headers.get("idempotency-key")
+        if not key:
+            yield IdempotentRequest(self.store)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+        handle = IdempotentRequest(self.store, (current_user.id, request.method, request.url.path, key))
+        handle.replay = self.store.begin(handle.key)
+        if handle.replay is not MISSING:
+            response.headers["Idempotent-Replayed"] = "true"
+            yield handle
+            return
+        try:
+            yield handle
+        finally:
+            if not handle.saved:
+                self.store.finish(handle.key)
+
+
+_settings = get_settings()
+idempotency_store = IdempotencyStore(
+    maxsize=_settings.idempotency_max_entries,
+    ttl=_settings.idempotency_ttl_seconds,
+)
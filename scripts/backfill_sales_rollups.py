@@ -0,0 +1,35 @@
+"""Rebuild the daily sales rollups from order_items.
+
+Replaces the contents of daily_product_sales and daily_category_sales with totals over
+every delivered/success order, in one transaction, so it is safe to re-run.
+
+    PYTHONPATH=. python scripts/backfill_sales_rollups.py
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.analytics import DailyCategorySales, DailyProductSales
+from app.repositories.analytics import AnalyticsRepository
+from app.services.order import DELIVERED_STATUSES
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        AnalyticsRepository(db).rebuild(DELIVERED_STATUSES)
+        db.commit()
+        products = db.scalar(select(func.count()).select_from(DailyProductSales))
+        categories = db.scalar(select(func.count()).select_from(DailyCategorySales))
+    elapsed = time.perf_counter() - started
+    print(f"daily_product_sales: {products} rows, daily_category_sales: {categories} rows ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Order history paging benchmark: offset vs keyset on a large orders table.
+
+Seeds ``--orders`` orders (one line each) spread over ``--users`` users, then times the
+summary listing at increasing page depths, once with OFFSET and once with a
+(created_at, id) cursor, for the admin listing and for one user's history.
+
+    PYTHONPATH=. python scripts/bench_order_history.py --orders 1000000 --users 1000
+    PYTHONPATH=. python scripts/bench_order_history.py --skip-seed
+
+Run it against a disposable Postgres database (DATABASE_URL) migrated to head.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.core.security import hash_password
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.repositories.order import OrderRepository
+
+BATCH = 10_000
+
+
+def seed(orders: int, users: int) -> None:
+    tag = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        category = Category(name=f"bench-{tag}")
+        db.add(category)
+        db.flush()
+        product = Product(
+            name=f"Bench product {tag}",
+            description="benchmark",
+            price=1000,
+            rating=0,
+            category_id=category.id,
+            stock_count=0,
+            views_count=0,
+            sold_count=0,
+        )
+        db.add(product)
+        hashed = hash_password("benchmark")
+        user_ids = db.scalars(
+            insert(User).returning(User.id),
+            [{"email": f"bench-{tag}-{i}@example.com", "hashed_password": hashed} for i in range(users)],
+        ).all()
+        db.commit()
+        product_id = product.id
+
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, orders, BATCH):
+        size = min(BATCH, orders - offset)
+        with SessionLocal() as db:
+            order_ids = db.scalars(
+                insert(Order).returning(Order.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "user_id": rng.choice(user_ids),
+                        "status": OrderStatus.delivered,
+                        "created_at": start + timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600)),
+                        "delivery_address_text": "benchmark",
+                    }
+                    for _ in range(size)
+                ],
+            ).all()
+            db.execute(
+                insert(OrderItem),
+                [
+                    {"order_id": order_id, "product_id": product_id, "quantity": 1, "unit_price": 1000}
+                    for order_id in order_ids
+                ],
+            )
+            db.commit()
+        print(f"seeded {offset + size}/{orders}", end="\r", flush=True)
+    print()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def bench(label: str, user_id: int | None, limit: int, pages: list[int], repeat: int) -> None:
+    with SessionLocal() as db:
+        repo = OrderRepository(db)
+        rows = db.scalar(
+            select(func.count()).select_from(Order).where(Order.user_id == user_id)
+            if user_id is not None
+            else select(func.count()).select_from(Order)
+        )
+        print(f"\n{label} ({rows} orders, limit {limit}, median of {repeat})")
+        print(f"{'page':>8} {'offset ms':>10} {'cursor ms':>10}")
+        for page in pages:
+            skip = (page - 1) * limit
+            if skip >= rows:
+                break
+            # cursor = last row of the previous page; looked up once, outside the timing
+            after = None
+            if skip:
+                last = repo.list_summaries(skip=skip - 1, limit=1, user_id=user_id)[0]
+                after = (last.created_at, last.id)
+            offset_ms = timed(lambda: repo.list_summaries(skip=skip, limit=limit, user_id=user_id), repeat)
+            cursor_ms = timed(lambda: repo.list_summaries(limit=limit, user_id=user_id, after=after), repeat)
+            print(f"{page:>8} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.orders, args.users)
+
+    with SessionLocal() as db:
+        busiest = db.execute(
+            select(Order.user_id).group_by(Order.user_id).order_by(func.count().desc()).limit(1)
+        ).scalar_one()
+
+    pages = [1, 10, 100, 1000, 10_000]
+    bench("all orders", None, args.limit, pages, args.repeat)
+    bench(f"user {busiest}", busiest, args.limit, pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Concurrent checkout benchmark for stock reservation.
+
+Fires ``--orders`` parallel single-line orders at one product that only has ``--stock``
+units and reports throughput and oversell. ``--legacy`` replays the old
+read/check/commit/decrement flow for comparison.
+
+    PYTHONPATH=. python scripts/bench_order_reservation.py --orders 500 --stock 200 --workers 32
+    PYTHONPATH=. python scripts/bench_order_reservation.py --orders 500 --stock 200 --workers 32 --legacy
+
+Run it against a disposable Postgres database (DATABASE_URL); it creates its own
+category, product and user.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from app.core.security import hash_password
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.order import OrderService
+
+
+def setup(stock: int) -> tuple[int, int]:
+    tag = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        category = Category(name=f"bench-{tag}")
+        user = User(email=f"bench-{tag}@example.com", hashed_password=hash_password("benchmark"))
+        db.add_all([category, user])
+        db.flush()
+        product = Product(
+            name=f"Bench product {tag}",
+            description="benchmark",
+            price=1000,
+            rating=0,
+            category_id=category.id,
+            stock_count=stock,
+            views_count=0,
+            sold_count=0,
+        )
+        db.add(product)
+        db.commit()
+        return product.id, user.id
+
+
+def order_reserved(product_id: int, user_id: int) -> bool:
+    with SessionLocal() as db:
+        try:
+            OrderService(db).create_order(
+                user_id,
+                OrderCreate(
+                    items=[OrderItemCreate(product_id=product_id, quantity=1)],
+                    delivery_address_text="benchmark",
+                ),
+            )
+        except ValueError:
+            return False
+        return True
+
+
+def order_legacy(product_id: int, user_id: int) -> bool:
+    # the pre-reservation flow: check in Python, commit the order, then decrement
+    with SessionLocal() as db:
+        product = db.get(Product, product_id)
+        if product.stock_count < 1:
+            return False
+        order = Order(
+            user_id=user_id,
+            status=OrderStatus.pending,
+            delivery_address_text="benchmark",
+            items=[OrderItem(product_id=product_id, quantity=1, unit_price=product.price)],
+        )
+        db.add(order)
+        db.commit()
+        product = db.get(Product, product_id)
+        product.stock_count -= 1
+        db.add(product)
+        db.commit()
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    product_id, user_id = setup(args.stock)
+    place = order_legacy if args.legacy else order_reserved
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda _: place(product_id, user_id), range(args.orders)))
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        stock_left = db.scalar(select(Product.stock_count).where(Product.id == product_id))
+        sold = db.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product_id)
+        )
+
+    accepted = sum(results)
+    print(f"mode:        {'legacy' if args.legacy else 'reservation'}")
+    print(f"orders:      {args.orders} ({accepted} accepted, {args.orders - accepted} rejected)")
+    print(f"elapsed:     {elapsed:.2f}s ({args.orders / elapsed:.0f} orders/s)")
+    print(f"stock:       {args.stock} -> {stock_left}")
+    print(f"units sold:  {sold}")
+    print(f"oversold:    {max(0, sold - args.stock)}")
+    print(f"lost decrements: {sold - (args.stock - stock_left)}")
+
+
+if __name__ == "__main__":
+    main()
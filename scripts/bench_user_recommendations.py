@@ -0,0 +1,60 @@
+"""Per-user recommendation build benchmark on synthetic histories.
+
+Generates ``--users`` users with a Zipf-distributed number of purchases over
+``--products`` products (popularity also Zipf-distributed, so a few products are in
+most histories), then times the item-neighbour build and the per-user scoring that
+scripts/build_user_recommendations.py runs. No database is needed.
+
+    PYTHONPATH=. python scripts/bench_user_recommendations.py
+    PYTHONPATH=. python scripts/bench_user_recommendations.py --users 100000 --products 50000 --mean-history 20
+"""
+from __future__ import annotations
+
+import argparse
+import resource
+import time
+
+import numpy as np
+
+from app.services.user_recommendations import item_neighbors, score_users
+
+
+def synthetic_history(users: int, products: int, mean_history: float, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    sizes = np.minimum(rng.zipf(1.8, users), 500)
+    sizes = np.maximum((sizes * mean_history / sizes.mean()).astype(np.int64), 1)
+    popularity = 1 / np.arange(1, products + 1) ** 0.8
+    popularity /= popularity.sum()
+    user_ids = np.repeat(np.arange(1, users + 1), sizes)
+    product_ids = rng.choice(products, size=user_ids.size, p=popularity) + 1
+    return user_ids, product_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--mean-history", type=float, default=10)
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--max-history", type=int, default=200)
+    parser.add_argument("--chunk-users", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    user_ids, product_ids = synthetic_history(args.users, args.products, args.mean_history, args.seed)
+    generated = time.perf_counter()
+    index = item_neighbors(user_ids, product_ids, neighbors=args.neighbors, max_history=args.max_history)
+    neighbors = time.perf_counter()
+    top = score_users(user_ids, product_ids, index, top_n=args.top_n, chunk_users=args.chunk_users)
+    scored = time.perf_counter()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"history:   {user_ids.size} pairs, {args.users} users x {args.products} products")
+    print(f"neighbours:{index.product_ids.size:>8} items, {index.neighbors.size} pairs ({neighbors - generated:.2f}s)")
+    print(f"scoring:   {top.user_ids.size} rows for {np.unique(top.user_ids).size} users ({scored - neighbors:.2f}s)")
+    print(f"total:     {scored - generated:.2f}s build, peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
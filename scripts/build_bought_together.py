@@ -0,0 +1,73 @@
+"""Build the "frequently bought together" index from order_items.
+
+Streams every (order_id, product_id) line of non-cancelled orders into NumPy arrays,
+scores product pairs by co-occurrence and writes the top-K neighbours per product to
+BOUGHT_TOGETHER_INDEX_PATH. The file is replaced atomically; running API processes
+pick it up within BOUGHT_TOGETHER_RELOAD_SECONDS.
+
+    PYTHONPATH=. python scripts/build_bought_together.py
+    PYTHONPATH=. python scripts/build_bought_together.py --score cosine --min-support 3
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from array import array
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.order import Order, OrderItem, OrderStatus
+from app.services.bought_together import CoOccurrenceScore, build_index
+
+
+def load_lines(batch_size: int) -> tuple[np.ndarray, np.ndarray]:
+    order_ids, product_ids = array("q"), array("q")
+    stmt = (
+        select(OrderItem.order_id, OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status != OrderStatus.cancelled, OrderItem.product_id.is_not(None))
+        .execution_options(yield_per=batch_size)
+    )
+    with SessionLocal() as db:
+        for partition in db.execute(stmt).partitions():
+            for order_id, product_id in partition:
+                order_ids.append(order_id)
+                product_ids.append(product_id)
+    return np.frombuffer(order_ids, dtype=np.int64), np.frombuffer(product_ids, dtype=np.int64)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=settings.bought_together_index_path)
+    parser.add_argument("--top-k", type=int, default=settings.bought_together_top_k)
+    parser.add_argument("--score", type=CoOccurrenceScore, default=CoOccurrenceScore.lift)
+    parser.add_argument("--min-support", type=int, default=2)
+    parser.add_argument("--max-basket", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    order_ids, product_ids = load_lines(args.batch_size)
+    loaded = time.perf_counter()
+    index = build_index(
+        order_ids,
+        product_ids,
+        top_k=args.top_k,
+        score=args.score,
+        min_support=args.min_support,
+        max_basket=args.max_basket,
+    )
+    index.save(args.path)
+    done = time.perf_counter()
+
+    print(f"lines:     {order_ids.size} ({loaded - started:.2f}s to load)")
+    print(f"products:  {index.product_ids.size} with neighbours, {index.neighbors.size} pairs kept")
+    print(f"written:   {args.path} ({done - loaded:.2f}s to build)")
+
+
+if __name__ == "__main__":
+    main()
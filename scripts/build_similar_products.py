@@ -0,0 +1,62 @@
+"""Build the TF-IDF "similar products" index.
+
+Vectorizes every product's name, description and category, computes the top-K most
+similar products per product and writes a new build under SIMILAR_PRODUCTS_INDEX_DIR,
+then repoints ``current`` at it. Running API processes memory-map the new build
+within SIMILAR_PRODUCTS_RELOAD_SECONDS and drop their incremental overlay.
+
+    PYTHONPATH=. python scripts/build_similar_products.py
+    PYTHONPATH=. python scripts/build_similar_products.py --top-k 30 --max-features 200000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.category import Category
+from app.models.product import Product
+from app.services.similar_products import ProductDocument, SimilarityIndex
+
+
+def load_documents(batch_size: int) -> list[ProductDocument]:
+    stmt = (
+        select(Product.id, Product.name, Product.description, Category.name)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .order_by(Product.id)
+        .execution_options(yield_per=batch_size)
+    )
+    with SessionLocal() as db:
+        return [
+            ProductDocument(product_id, name, description or "", category or "")
+            for product_id, name, description, category in db.execute(stmt)
+        ]
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=settings.similar_products_index_dir)
+    parser.add_argument("--top-k", type=int, default=settings.similar_products_top_k)
+    parser.add_argument("--max-features", type=int, default=settings.similar_products_max_features)
+    parser.add_argument("--block-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    docs = load_documents(args.batch_size)
+    loaded = time.perf_counter()
+    index = SimilarityIndex.build(docs, top_k=args.top_k, max_features=args.max_features, block_size=args.block_size)
+    build = index.save(args.dir)
+    done = time.perf_counter()
+
+    print(f"products:  {len(docs)} ({loaded - started:.2f}s to load)")
+    print(f"features:  {len(index.vectorizer.vocabulary)}")
+    print(f"written:   {build} ({done - loaded:.2f}s to build)")
+
+
+if __name__ == "__main__":
+    main()
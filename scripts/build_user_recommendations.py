@@ -0,0 +1,91 @@
+"""Build the per-user recommendations behind GET /recommendations/for-me.
+
+Streams every user's history (lines of non-cancelled orders, plus ratings of at least
+USER_RECOMMENDATIONS_MIN_RATING) into NumPy arrays, computes item-item cosine
+neighbours over those histories and scores each user's unseen products by their
+similarity to the history (item-based collaborative filtering). The top-N per user
+replace the contents of user_recommendations in one transaction.
+
+Lower ratings are never recommended back but do not count as liking a product. Users
+without a usable history get no rows and are served the most-sold list.
+
+    PYTHONPATH=. python scripts/build_user_recommendations.py
+    PYTHONPATH=. python scripts/build_user_recommendations.py --top-n 100 --neighbors 100
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from array import array
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product_feedback import ProductRating
+from app.repositories.recommendation import UserRecommendationRepository
+from app.services.user_recommendations import item_neighbors, score_users
+
+
+def load_pairs(stmt, batch_size: int) -> tuple[np.ndarray, np.ndarray]:
+    user_ids, product_ids = array("q"), array("q")
+    with SessionLocal() as db:
+        for partition in db.execute(stmt.execution_options(yield_per=batch_size)).partitions():
+            for user_id, product_id in partition:
+                user_ids.append(user_id)
+                product_ids.append(product_id)
+    return np.frombuffer(user_ids, dtype=np.int64), np.frombuffer(product_ids, dtype=np.int64)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-n", type=int, default=settings.user_recommendations_top_n)
+    parser.add_argument("--neighbors", type=int, default=settings.user_recommendations_neighbors)
+    parser.add_argument("--min-rating", type=int, default=settings.user_recommendations_min_rating)
+    parser.add_argument("--min-support", type=int, default=2)
+    parser.add_argument("--max-history", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    bought = load_pairs(
+        select(Order.user_id, OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status != OrderStatus.cancelled, OrderItem.product_id.is_not(None)),
+        args.batch_size,
+    )
+    liked = load_pairs(
+        select(ProductRating.user_id, ProductRating.product_id).where(ProductRating.rating >= args.min_rating),
+        args.batch_size,
+    )
+    disliked = load_pairs(
+        select(ProductRating.user_id, ProductRating.product_id).where(ProductRating.rating < args.min_rating),
+        args.batch_size,
+    )
+    user_ids = np.concatenate([bought[0], liked[0]])
+    product_ids = np.concatenate([bought[1], liked[1]])
+    loaded = time.perf_counter()
+
+    index = item_neighbors(
+        user_ids, product_ids, neighbors=args.neighbors, min_support=args.min_support, max_history=args.max_history
+    )
+    top = score_users(
+        user_ids, product_ids, index, top_n=args.top_n, seen_user_ids=disliked[0], seen_product_ids=disliked[1]
+    )
+    built = time.perf_counter()
+
+    with SessionLocal() as db:
+        written = UserRecommendationRepository(db).replace_all(top.rows())
+        db.commit()
+    done = time.perf_counter()
+
+    print(f"history:   {user_ids.size} pairs, {disliked[0].size} low ratings ({loaded - started:.2f}s to load)")
+    print(f"items:     {index.product_ids.size} with neighbours ({built - loaded:.2f}s to build and score)")
+    print(f"written:   {written} rows for {np.unique(top.user_ids).size} users ({done - built:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
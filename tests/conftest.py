@@ -1,8 +1,8 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -10,6 +10,12 @@ import app.models  # noqa: F401
 from app.core.deps import get_db
 from app.db.base import Base
 from app.main import app
+from app.models.category import Category
+from app.models.product import Product
+from app.services.user_recommendations import user_recommendation_cache
+from app.services.view_counter import view_counter
+from app.utils.cache import catalog_version
+from app.utils.idempotency import idempotency_store
 
 engine = create_engine(
     "sqlite://",
@@ -17,6 +23,7 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+view_counter.session_factory = TestingSessionLocal
 
 
 @pytest.fixture
@@ -39,6 +46,54 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # every test starts from a fresh database, so nothing cached by a previous test may match
+    catalog_version.bump()
+    idempotency_store.clear()
+    user_recommendation_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def sql_statements() -> Generator[list[str], None, None]:
+    """Collects every SQL statement sent to the test engine while the test runs."""
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def auth_headers(client: TestClient) -> Callable[..., dict[str, str]]:
+    """Registers ``email`` (a no-op if it exists), logs in and returns its Bearer header."""
+
+    def login(email: str = "buyer@example.com", is_admin: bool = False) -> dict[str, str]:
+        client.post("/auth/register", json={"email": email, "password": "password123", "is_admin": is_admin})
+        response = client.post("/auth/login", data={"username": email, "password": "password123"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
+
+
+@pytest.fixture
+def seed_products(db_session: Session) -> Callable[..., list[Product]]:
+    """Adds a category and one product per column dict in it; unset columns get test defaults."""
+
+    def seed(category_name: str, *rows: dict) -> list[Product]:
+        category = Category(name=category_name)
+        db_session.add(category)
+        db_session.commit()
+        defaults = {"description": "Test", "price": 10.0, "rating": 0, "stock_count": 10}
+        products = [Product(**{**defaults, **row}, category_id=category.id) for row in rows]
+        db_session.add_all(products)
+        db_session.commit()
+        return products
+
+    return seed
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from app.models.order import Order, OrderItem
+from app.models.user import User
+from app.repositories.analytics import AnalyticsRepository
+from app.services.order import DELIVERED_STATUSES
+
+
+def test_sales_rollups_follow_deliveries_and_backfill(client, auth_headers, seed_products, db_session):
+    (dress,) = seed_products("Dresses", {"name": "Dress", "description": "Silk", "price": 100.0})
+    (hat,) = seed_products("Hats", {"name": "Hat", "description": "Wool", "price": 20.0})
+    dresses_id = dress.category_id
+    headers = auth_headers("admin@example.com", is_admin=True)
+    admin = db_session.query(User).filter(User.email == "admin@example.com").one()
+
+    def make_order(day, *lines):
+        order = Order(
+            user_id=admin.id,
+            created_at=datetime(2026, 3, day, 15, 30),
+            delivery_address_text="Test address",
+            items=[OrderItem(product_id=p.id, quantity=q, unit_price=p.price) for p, q in lines],
+        )
+        db_session.add(order)
+        db_session.commit()
+        return order.id
+
+    first = make_order(1, (dress, 1), (hat, 2))
+    second = make_order(2, (hat, 1))
+    make_order(2, (dress, 5))  # never delivered
+
+    client.post("/orders/status:bulk", headers=headers, json={"order_ids": [first, second], "status": "delivered"})
+    # delivered -> success is not a new sale
+    client.put(f"/orders/{first}/status", headers=headers, json={"status": "success"})
+
+    def report(group_by):
+        response = client.get(
+            "/admin/analytics/sales",
+            headers=headers,
+            params={"from": "2026-03-01", "to": "2026-03-31", "group_by": group_by},
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    by_day = report("day")
+    assert (by_day["units"], by_day["revenue"]) == (4, 160.0)
+    assert [(row["day"], row["units"], row["revenue"]) for row in by_day["rows"]] == [
+        ("2026-03-01", 3, 140.0),
+        ("2026-03-02", 1, 20.0),
+    ]
+    assert [(row["category_name"], row["revenue"]) for row in report("category")["rows"]] == [
+        ("Dresses", 100.0),
+        ("Hats", 60.0),
+    ]
+    expected_products = [(row["product_name"], row["units"]) for row in report("product")["rows"]]
+    assert expected_products == [("Dress", 1), ("Hat", 3)]
+
+    AnalyticsRepository(db_session).rebuild(DELIVERED_STATUSES)
+    db_session.commit()
+    assert report("day") == by_day
+
+    # cancelling a delivered order takes it back out; delivering it again counts it once
+    client.put(f"/orders/{second}/status", headers=headers, json={"status": "cancelled"})
+    cancelled = report("day")
+    assert [(row["day"], row["units"]) for row in cancelled["rows"]] == [("2026-03-01", 3)]
+    AnalyticsRepository(db_session).rebuild(DELIVERED_STATUSES)
+    db_session.commit()
+    assert report("day") == cancelled
+    client.put(f"/orders/{second}/status", headers=headers, json={"status": "delivered"})
+    assert report("day") == by_day
+
+    # the category credited at delivery is the one debited, even after the product moves
+    hat.category_id = dresses_id
+    db_session.commit()
+    client.put(f"/orders/{second}/status", headers=headers, json={"status": "cancelled"})
+    by_category = report("category")
+    assert [(row["category_name"], row["revenue"]) for row in by_category["rows"]] == [
+        ("Dresses", 100.0),
+        ("Hats", 40.0),
+    ]
+    AnalyticsRepository(db_session).rebuild(DELIVERED_STATUSES)
+    db_session.commit()
+    assert report("category") == by_category
+
+    bad = client.get(
+        "/admin/analytics/sales", headers=headers, params={"from": "2026-04-01", "to": "2026-03-01"}
+    )
+    assert bad.status_code == 400
@@ -1,5 +1,9 @@
+from datetime import datetime
+
 from app.models.category import Category
-from app.models.product import Product
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductImage, ProductVariant
+from app.models.user import User
 from app.repositories.product import ProductRepository
 
 
@@ -75,4 +79,227 @@ def test_create_order_increments_sold_count(client, db_session):
     # 6) Now sold_count should be incremented
     updated_product = ProductRepository(db_session).get(product.id)
     assert updated_product is not None
-    assert updated_product.sold_count == 2
\ No newline at end of file
+    assert updated_product.sold_count == 2
+
+def test_create_order_rejects_oversell_without_side_effects(client, auth_headers, seed_products, db_session):
+    hat, cap = seed_products(
+        "Hats",
+        {"name": "Hat", "description": "Wool", "price": 50.0, "stock_count": 3},
+        {"name": "Cap", "description": "Cotton", "price": 20.0, "stock_count": 1},
+    )
+    headers = auth_headers()
+
+    # two lines for the same product add up past the stock
+    response = client.post(
+        "/orders",
+        headers=headers,
+        json={
+            "items": [
+                {"product_id": hat.id, "quantity": 2},
+                {"product_id": cap.id, "quantity": 1},
+                {"product_id": hat.id, "quantity": 2},
+            ],
+            "delivery_address_text": "Test address",
+        },
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Out of stock: product_id={hat.id}"
+
+    db_session.refresh(hat)
+    db_session.refresh(cap)
+    assert (hat.stock_count, cap.stock_count) == (3, 1)
+    assert client.get("/orders/me", headers=headers).json() == []
+
+    ok = client.post(
+        "/orders",
+        headers=headers,
+        json={"items": [{"product_id": hat.id, "quantity": 3}], "delivery_address_text": "Test address"},
+    )
+    assert ok.status_code == 201
+    db_session.refresh(hat)
+    assert hat.stock_count == 0
+
+
+def test_create_order_query_count_does_not_grow_with_lines(
+    client, auth_headers, seed_products, db_session, sql_statements
+):
+    products = seed_products("Socks", *({"name": f"Sock {i}", "stock_count": 50} for i in range(6)))
+    for product in products:
+        db_session.add(ProductVariant(product_id=product.id, name="L", price=12.0))
+    db_session.commit()
+    lines = [(product.id, product.variants[0].id) for product in products]
+    headers = auth_headers()
+
+    def place(order_lines):
+        sql_statements.clear()
+        response = client.post(
+            "/orders",
+            headers=headers,
+            json={
+                "items": [
+                    {"product_id": product_id, "variant_id": variant_id, "quantity": 1}
+                    for product_id, variant_id in order_lines
+                ],
+                "delivery_address_text": "Test address",
+            },
+        )
+        assert response.status_code == 201
+        assert len(response.json()["items"]) == len(order_lines)
+        return len(sql_statements)
+
+    assert place(lines[:1]) == place(lines)
+
+
+def test_create_order_notifies_every_admin(client, auth_headers, seed_products):
+    (scarf,) = seed_products("Scarves", {"name": "Scarf", "price": 30.0, "stock_count": 5})
+    admins = {email: auth_headers(email, is_admin=True) for email in ("a1@example.com", "a2@example.com")}
+    buyer = auth_headers()
+
+    response = client.post(
+        "/orders",
+        headers=buyer,
+        json={"items": [{"product_id": scarf.id, "quantity": 1}], "delivery_address_text": "Test address"},
+    )
+    assert response.status_code == 201
+    order_id = response.json()["id"]
+
+    for headers in admins.values():
+        notifications = client.get("/notifications", headers=headers).json()
+        assert [(n["type"], n["data"]) for n in notifications] == [("new_order", {"order_id": order_id})]
+    assert client.get("/notifications", headers=buyer).json() == []
+
+
+def test_create_order_replays_idempotency_key(client, auth_headers, seed_products, db_session):
+    (gloves,) = seed_products("Gloves", {"name": "Gloves", "price": 40.0, "stock_count": 5})
+    headers = auth_headers()
+    body = {"items": [{"product_id": gloves.id, "quantity": 2}], "delivery_address_text": "Test address"}
+
+    def place(key):
+        return client.post("/orders", headers={**headers, "Idempotency-Key": key}, json=body)
+
+    first = place("retry-1")
+    retry = place("retry-1")
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    db_session.refresh(gloves)
+    assert gloves.stock_count == 3
+    assert len(client.get("/orders/me", headers=headers).json()) == 1
+
+    assert place("retry-2").json()["id"] != first.json()["id"]
+
+
+def test_order_summary_view_and_detail(client, auth_headers, seed_products, db_session):
+    bag, belt = seed_products(
+        "Bags",
+        {"name": "Bag", "description": "Canvas", "price": 25.0},
+        {"name": "Belt", "description": "Leather", "price": 15.0},
+    )
+    db_session.add(ProductImage(product_id=bag.id, url="/media/bag.jpg"))
+    db_session.commit()
+    headers = auth_headers()
+
+    order = client.post(
+        "/orders",
+        headers=headers,
+        json={
+            "items": [{"product_id": bag.id, "quantity": 2}, {"product_id": belt.id, "quantity": 1}],
+            "delivery_address_text": "Test address",
+        },
+    ).json()
+
+    summaries = client.get("/orders/me", params={"view": "summary"}, headers=headers).json()
+    assert summaries == [
+        {
+            "id": order["id"],
+            "status": "pending",
+            "delivery_address_text": "Test address",
+            "total": 65.0,
+            "item_count": 2,
+            "thumbnail_url": "/media/bag.jpg",
+            "created_at": order["created_at"],
+        }
+    ]
+    paged = client.get("/orders/me/paged", params={"view": "summary"}, headers=headers).json()
+    assert (paged["items"], paged["total"]) == (summaries, 1)
+
+    assert client.get(f"/orders/{order['id']}", headers=headers).json() == order
+    other = client.get(f"/orders/{order['id']}", headers=auth_headers("other@example.com"))
+    assert other.status_code == 404
+
+
+def test_order_history_cursor_pagination_newest_first(client, auth_headers, db_session):
+    headers = auth_headers()
+    buyer = db_session.query(User).filter(User.email == "buyer@example.com").one()
+
+    # two orders share a timestamp, so the id has to break the tie
+    stamps = [datetime(2026, 1, day) for day in (3, 1, 2, 2, 5)]
+    orders = [Order(user_id=buyer.id, created_at=stamp, delivery_address_text="Test address") for stamp in stamps]
+    db_session.add_all(orders)
+    db_session.commit()
+    expected = [o.id for o in sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "view": "summary"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/orders/me", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [order["id"] for order in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected
+
+    paged = client.get("/orders/me/paged", params={"limit": 3}, headers=headers).json()
+    assert [order["id"] for order in paged["items"]] == expected[:3]
+    rest = client.get("/orders/me/paged", params={"limit": 3, "cursor": paged["next_cursor"]}, headers=headers).json()
+    assert [order["id"] for order in rest["items"]] == expected[3:]
+    assert (rest["total"], rest["next_cursor"]) == (5, None)
+
+    assert client.get("/orders/me", params={"cursor": "junk"}, headers=headers).status_code == 400
+
+
+def test_bulk_status_update_counts_each_delivery_once(client, auth_headers, seed_products, db_session):
+    boot, heel = seed_products(
+        "Shoes",
+        {"name": "Boot", "description": "Suede", "price": 90.0},
+        {"name": "Heel", "description": "Patent", "price": 70.0},
+    )
+    headers = auth_headers("admin@example.com", is_admin=True)
+    admin = db_session.query(User).filter(User.email == "admin@example.com").one()
+
+    def make_order(*lines):
+        order = Order(
+            user_id=admin.id,
+            delivery_address_text="Test address",
+            items=[OrderItem(product_id=p.id, quantity=q, unit_price=p.price) for p, q in lines],
+        )
+        db_session.add(order)
+        db_session.commit()
+        return order.id
+
+    first = make_order((boot, 2), (heel, 1))
+    second = make_order((boot, 3))
+
+    response = client.post(
+        "/orders/status:bulk",
+        headers=headers,
+        json={"order_ids": [first, second, 999_999], "status": "delivered"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"updated": sorted([first, second]), "not_found": [999_999]}
+
+    # already delivered, so moving to success must not count the units again
+    again = client.post("/orders/status:bulk", headers=headers, json={"order_ids": [first], "status": "success"})
+    assert again.status_code == 200
+
+    db_session.expire_all()
+    assert (boot.sold_count, heel.sold_count) == (5, 1)
+    statuses = {o.id: o.status.value for o in db_session.query(Order).all()}
+    assert statuses == {first: "success", second: "delivered"}
+
+    invalid = client.post("/orders/status:bulk", headers=headers, json={"order_ids": [first], "status": "lost"})
+    assert invalid.status_code == 400
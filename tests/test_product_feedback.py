@@ -0,0 +1,73 @@
+def test_rating_aggregates_follow_upserts_and_deletes_without_rescanning(
+    client, auth_headers, seed_products, db_session, sql_statements
+):
+    (bag,) = seed_products("Bags", {"name": "Bag", "description": "Leather", "stock_count": 1})
+    alice, bob = auth_headers("alice@example.com"), auth_headers("bob@example.com")
+
+    def stats():
+        body = client.get(f"/products/{bag.id}/rating").json()
+        return body["average"], body["count"], [body["histogram"][str(stars)] for stars in range(1, 6)]
+
+    sql_statements.clear()
+    assert client.post(f"/products/{bag.id}/rating", json={"rating": 5}, headers=alice).status_code == 201
+    assert client.post(f"/products/{bag.id}/rating", json={"rating": 2}, headers=bob).status_code == 201
+    assert stats() == (3.5, 2, [0, 1, 0, 0, 1])
+
+    # changing a rating moves the sum only
+    start = len(sql_statements)
+    client.post(f"/products/{bag.id}/rating", json={"rating": 4}, headers=bob)
+    # the previous rating is read by its own statement after the product row is locked
+    upserting = sql_statements[start:]
+    lock = next(i for i, s in enumerate(upserting) if s.startswith("SELECT products.id \nFROM products"))
+    previous = next(i for i, s in enumerate(upserting) if s.startswith("SELECT product_ratings.rating \nFROM"))
+    assert lock < previous
+    assert stats() == (4.5, 2, [0, 0, 0, 1, 1])
+    assert client.get(f"/products/{bag.id}/my-rating", headers=bob).json()["rating"] == 4
+
+    start = len(sql_statements)
+    assert client.delete(f"/products/{bag.id}/rating", headers=alice).status_code == 204
+    # the delete takes the same product-row lock as the upsert before touching the rating
+    deleting = sql_statements[start:]
+    removed = next(i for i, s in enumerate(deleting) if s.startswith("DELETE FROM product_ratings"))
+    # the existence check, then the lock (SQLite renders both without FOR UPDATE)
+    assert sum(s.startswith("SELECT products.id \nFROM products") for s in deleting[:removed]) == 2
+    assert stats() == (4.0, 1, [0, 0, 0, 1, 0])
+    db_session.refresh(bag)
+    assert (bag.rating, bag.rating_sum, bag.rating_count) == (4.0, 4, 1)
+
+    assert not [s for s in sql_statements if "avg(" in s.lower() or "FROM product_ratings GROUP BY" in s]
+    assert client.post("/products/999/rating", json={"rating": 3}, headers=alice).status_code == 404
+
+
+def test_rating_stats_batch_reads_stored_aggregates_in_one_query(client, auth_headers, seed_products, sql_statements):
+    hat, cap = seed_products("Hats", {"name": "Hat", "description": "Wool"}, {"name": "Cap", "description": "Wool"})
+    hat_id, cap_id = hat.id, cap.id
+    headers = {}
+    for email, rating in [("alice@example.com", 5), ("bob@example.com", 3)]:
+        headers[email] = auth_headers(email)
+        client.post(f"/products/{hat_id}/rating", json={"rating": rating}, headers=headers[email])
+
+    sql_statements.clear()
+    response = client.post("/products/ratings:batch", json={"product_ids": [cap_id, hat_id, 999]})
+    assert response.status_code == 200
+    by_id = {item["product_id"]: item for item in response.json()}
+    assert set(by_id) == {hat_id, cap_id}
+    assert (by_id[hat_id]["average"], by_id[hat_id]["histogram"]) == (4.0, {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1})
+    assert (by_id[cap_id]["count"], by_id[hat_id]["my_rating"]) == (0, None)
+    assert len(sql_statements) == 1 and "product_ratings" not in sql_statements[0]
+
+    # signed in, the caller's own ratings come from one more IN query
+    sql_statements.clear()
+    response = client.post(
+        "/products/ratings:batch", json={"product_ids": [hat_id, cap_id]}, headers=headers["bob@example.com"]
+    )
+    assert {item["product_id"]: item["my_rating"] for item in response.json()} == {hat_id: 3, cap_id: None}
+    feedback_queries = [s for s in sql_statements if "FROM products" in s or "FROM product_ratings" in s]
+    assert len(feedback_queries) == 2
+    assert all("product_images" not in s and "categories" not in s for s in sql_statements)
+
+    bad_token = {"Authorization": "Bearer nope"}
+    assert client.post("/products/ratings:batch", json={"product_ids": [hat_id]}, headers=bad_token).status_code == 401
+
+    too_many = {"product_ids": list(range(1, 202))}
+    assert client.post("/products/ratings:batch", json=too_many).status_code == 422
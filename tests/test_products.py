@@ -0,0 +1,297 @@
+import csv
+import io
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models.category import Category
+from app.models.product import Product
+from app.services.product_import import ProductImportService
+from app.services.view_counter import view_counter
+
+
+def _seed_products(db_session, count: int) -> list[Product]:
+    category = Category(name="Bags")
+    db_session.add(category)
+    db_session.commit()
+
+    products = [
+        Product(
+            name=f"Bag {i}",
+            description="Leather bag",
+            price=10 + (i % 4),
+            rating=0,
+            category_id=category.id,
+            stock_count=5,
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    return products
+
+
+def test_cursor_pagination_walks_catalog_without_gaps(client, db_session):
+    products = _seed_products(db_session, 7)
+
+    seen: list[int] = []
+    prices: list[float] = []
+    cursor = None
+    while True:
+        params = {"limit": 3, "sort": "price_desc"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/products/paged", params=params)
+        assert response.status_code == 200
+        payload = response.json()
+        assert payload["total"] == 7
+        seen.extend(item["id"] for item in payload["items"])
+        prices.extend(item["price"] for item in payload["items"])
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(p.id for p in products)
+    assert prices == sorted(prices, reverse=True)
+
+    # old clients keep using skip/next_skip
+    legacy = client.get("/products/paged", params={"skip": 3, "limit": 3}).json()
+    assert legacy["next_skip"] == 6
+    assert [item["id"] for item in legacy["items"]] == sorted(p.id for p in products)[3:6]
+
+
+def test_cursor_must_match_sort(client, db_session):
+    _seed_products(db_session, 3)
+
+    response = client.get("/products", params={"limit": 1, "sort": "newest"})
+    assert response.status_code == 200
+    cursor = response.headers["X-Next-Cursor"]
+
+    assert client.get("/products", params={"sort": "price_asc", "cursor": cursor}).status_code == 400
+    assert client.get("/products", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_search_matches_description_and_ranks_name_hits_first(client, db_session):
+    category = Category(name="Shoes")
+    db_session.add(category)
+    db_session.commit()
+    db_session.add_all(
+        [
+            Product(name="Sandals", description="Pairs well with a linen dress", price=30,
+                    rating=0, category_id=category.id),
+            Product(name="Linen dress", description="Summer classic", price=80,
+                    rating=0, category_id=category.id),
+            Product(name="Boots", description="Winter", price=90, rating=0, category_id=category.id),
+        ]
+    )
+    db_session.commit()
+
+    payload = client.get("/products/paged", params={"q": "linen"}).json()
+    assert payload["total"] == 2
+    assert [item["name"] for item in payload["items"]] == ["Linen dress", "Sandals"]
+
+
+def test_product_views_are_buffered_and_flushed_in_one_batch(client, db_session):
+    products = _seed_products(db_session, 2)
+
+    for _ in range(3):
+        assert client.get(f"/products/{products[0].id}").status_code == 200
+    assert client.get(f"/products/{products[1].id}").status_code == 200
+
+    # GET is read-only now; the counts land on the next flush
+    db_session.refresh(products[0])
+    assert products[0].views_count == 0
+    assert view_counter.flush() == 2
+    db_session.refresh(products[0])
+    db_session.refresh(products[1])
+    assert (products[0].views_count, products[1].views_count) == (3, 1)
+
+
+def test_listing_cache_is_invalidated_by_catalog_writes(client, auth_headers, db_session):
+    products = _seed_products(db_session, 2)
+    headers = auth_headers("admin@example.com", is_admin=True)
+
+    assert client.get("/products/count").json() == {"total": 2}
+    assert client.get("/products/count").json() == {"total": 2}
+    stats = client.get("/products/cache/stats", headers=headers).json()["listing"]
+    assert stats["hits"] >= 1
+
+    created = client.post(
+        "/products",
+        headers=headers,
+        json={"name": "Tote", "description": "Canvas", "price": 15, "category_id": products[0].category_id},
+    )
+    assert created.status_code == 201
+    assert client.get("/products/count").json() == {"total": 3}
+    assert client.get("/products/count", params={"q": "tote"}).json() == {"total": 1}
+
+
+def test_product_detail_revalidates_with_etag(client, auth_headers, db_session):
+    product = _seed_products(db_session, 1)[0]
+
+    first = client.get(f"/products/{product.id}")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "stale-while-revalidate" in first.headers["Cache-Control"]
+
+    again = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert view_counter.pending()[product.id] == 2
+
+    client.put(f"/products/{product.id}", headers=auth_headers("admin@example.com", is_admin=True), json={"price": 99})
+    changed = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["price"] == 99
+
+
+def test_product_etag_changes_with_stock_and_ratings(client, auth_headers, db_session):
+    product = _seed_products(db_session, 1)[0]
+    headers = auth_headers()
+
+    etag = client.get(f"/products/{product.id}").headers["ETag"]
+    order = {"items": [{"product_id": product.id, "quantity": 2}], "delivery_address_text": "Test address"}
+    assert client.post("/orders", headers=headers, json=order).status_code == 201
+    after_order = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert after_order.status_code == 200
+    assert after_order.json()["stock_count"] == 3
+
+    etag = after_order.headers["ETag"]
+    assert client.post(f"/products/{product.id}/rating", json={"rating": 4}, headers=headers).status_code == 201
+    after_rating = client.get(f"/products/{product.id}", headers={"If-None-Match": etag})
+    assert after_rating.status_code == 200
+
+
+def test_view_flush_keeps_product_etag(client, db_session):
+    product = _seed_products(db_session, 1)[0]
+
+    etag = client.get(f"/products/{product.id}").headers["ETag"]
+    listing_etag = client.get("/products").headers["ETag"]
+    assert view_counter.flush() == 1
+
+    assert client.get(f"/products/{product.id}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/products", headers={"If-None-Match": listing_etag}).status_code == 304
+
+
+def test_paged_listing_gets_total_in_the_same_query(client, db_session, sql_statements):
+    _seed_products(db_session, 7)
+    sql_statements.clear()
+
+    payload = client.get("/products/paged", params={"skip": 3, "limit": 3}).json()
+    assert (payload["total"], payload["next_skip"]) == (7, 6)
+    product_queries = [s for s in sql_statements if "FROM products" in s]
+    assert len(product_queries) == 1
+    assert "OVER ()" in product_queries[0]
+
+    last = client.get("/products/paged", params={"skip": 6, "limit": 3, "total": "none"}).json()
+    assert (last["total"], last["next_skip"], len(last["items"])) == (None, None, 1)
+
+
+def test_facets_count_categories_price_buckets_and_stock(client, db_session):
+    shoes, bags = Category(name="Shoes"), Category(name="Bags")
+    db_session.add_all([shoes, bags])
+    db_session.commit()
+    db_session.add_all(
+        [
+            Product(name="Sneakers", description="", price=90_000, rating=0, category_id=shoes.id, stock_count=3),
+            Product(name="Boots", description="", price=450_000, rating=0, category_id=shoes.id, stock_count=0),
+            Product(name="Clutch", description="", price=150_000, rating=0, category_id=bags.id, stock_count=1),
+        ]
+    )
+    db_session.commit()
+
+    facets = client.get("/products/facets").json()
+    assert (facets["total"], facets["in_stock"], facets["out_of_stock"]) == (3, 2, 1)
+    assert facets["categories"] == [
+        {"category_id": shoes.id, "count": 2},
+        {"category_id": bags.id, "count": 1},
+    ]
+    assert [bucket["count"] for bucket in facets["price_buckets"]] == [1, 1, 0, 1, 0, 0]
+    assert facets["price_buckets"][-1]["max"] is None
+
+    filtered = client.get("/products/facets", params={"price_max": 200_000}).json()
+    assert filtered["total"] == 2
+
+
+def test_bulk_import_streams_csv_and_reports_bad_rows(client, auth_headers, db_session):
+    category = Category(name="Scarves")
+    db_session.add(category)
+    db_session.commit()
+
+    body = "\n".join(
+        [
+            "name,description,price,category_id,stock_count,images,variants",
+            f'Silk scarf,"Hand made,\nsoft",120000,{category.id},4,https://cdn/a.jpg|https://cdn/b.jpg,S:120000|L:140000',
+            f"Wool scarf,Warm,not-a-price,{category.id},1,,",
+            "Cotton scarf,Light,50000,999,1,,",
+            f"Linen scarf,Summer,60000,{category.id},0,,",
+        ]
+    )
+    response = client.post(
+        "/products/bulk-import",
+        headers={**auth_headers("admin@example.com", is_admin=True), "Content-Type": "text/csv"},
+        content=body.encode("utf-8"),
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["created"], report["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+
+    products = client.get("/products", params={"q": "scarf"}).json()
+    silk = next(item for item in products if item["name"] == "Silk scarf")
+    assert silk["description"] == "Hand made,\nsoft"
+    assert len(silk["images"]) == 2
+    assert sorted(variant["name"] for variant in silk["variants"]) == ["L", "S"]
+
+
+def test_bulk_import_names_the_rows_the_database_rejects(client, auth_headers, db_session, monkeypatch):
+    category = Category(name="Scarves")
+    db_session.add(category)
+    db_session.commit()
+    real_insert = ProductImportService._insert
+
+    def insert(self, payloads):
+        payloads = list(payloads)
+        if any(payload.name == "Broken scarf" for payload in payloads):
+            raise IntegrityError("INSERT INTO products ...", {}, Exception("constraint products_secret_check"))
+        return real_insert(self, payloads)
+
+    monkeypatch.setattr(ProductImportService, "_insert", insert)
+    rows = [
+        {"name": "Silk scarf", "description": "Soft", "price": 10, "category_id": category.id},
+        {"name": "x" * 201, "description": "Long", "price": 10, "category_id": category.id},
+        {"name": "Broken scarf", "description": "Odd", "price": 10, "category_id": category.id},
+        {"name": "Wool scarf", "description": "Warm", "price": 1e9, "category_id": category.id},
+        {"name": "Linen scarf", "description": "Light", "price": 10, "category_id": category.id},
+    ]
+    response = client.post(
+        "/products/bulk-import",
+        params={"format": "ndjson"},
+        headers=auth_headers("admin@example.com", is_admin=True),
+        content="\n".join(json.dumps(row) for row in rows),
+    )
+    report = response.json()
+    assert (report["received"], report["created"], report["failed"]) == (5, 2, 3)
+    assert [(error["row"], error["error"]) for error in report["errors"]] == [
+        (2, "name: at most 200 characters"),
+        (4, "price: must be less than 100000000"),
+        (3, "Insert failed"),
+    ]
+
+
+def test_export_streams_ndjson_and_gzipped_csv(client, auth_headers, db_session):
+    _seed_products(db_session, 3)
+    headers = auth_headers("admin@example.com", is_admin=True)
+
+    ndjson = client.get("/products/export", headers=headers)
+    assert ndjson.status_code == 200
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Bag 0", "Bag 1", "Bag 2"]
+    assert rows[0]["category"]["name"] == "Bags"
+
+    exported = client.get("/products/export", params={"format": "csv", "gzip": True}, headers=headers)
+    assert exported.headers["Content-Encoding"] == "gzip"
+    # httpx transparently decodes Content-Encoding: gzip
+    lines = list(csv.reader(io.StringIO(exported.text)))
+    assert lines[0][:3] == ["id", "name", "description"]
+    assert len(lines) == 4
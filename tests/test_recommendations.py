@@ -0,0 +1,288 @@
+import json
+import os
+
+import numpy as np
+
+import app.services.product as product_service
+import app.services.recommendation as recommendation_service
+import app.services.similar_products as similar_products_module
+from app.models.category import Category
+from app.models.product import Product
+from app.services.bought_together import BoughtTogether, CoOccurrenceScore, build_index
+from app.models.user import User
+from app.repositories.recommendation import UserRecommendationRepository
+from app.services.leaderboard import leaderboards
+from app.services.similar_products import ProductDocument, SimilarityIndex, SimilarProducts
+from app.services.trending import DecayedScores, Trending, TrendingWindow
+from app.services.user_recommendations import item_neighbors, score_users
+from app.utils.cache import catalog_version
+
+
+def test_most_sold_leaderboard_global_per_category_and_refresh(client, db_session, sql_statements):
+    bags, hats = Category(name="Bags"), Category(name="Hats")
+    db_session.add_all([bags, hats])
+    db_session.commit()
+    products = {
+        name: Product(
+            name=name,
+            description="Test",
+            price=10,
+            rating=0,
+            category_id=category.id,
+            stock_count=5,
+            sold_count=sold,
+        )
+        for name, category, sold in [("Tote", bags, 5), ("Clutch", bags, 9), ("Beret", hats, 7), ("Cap", hats, 1)]
+    }
+    db_session.add_all(products.values())
+    db_session.commit()
+
+    def names(**params):
+        response = client.get("/recommendations/most-sold", params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "ETag" in response.headers
+        return [product["name"] for product in response.json()]
+
+    def board_queries():
+        return [s for s in sql_statements if "ORDER BY products.sold_count DESC" in s]
+
+    sql_statements.clear()
+    assert names(limit=3) == ["Clutch", "Beret", "Tote"]
+    # only the requested board is built, as a LIMIT query the metric indexes serve
+    assert len(board_queries()) == 1
+    assert not [s for s in sql_statements if "OVER" in s]
+    assert names(category_id=hats.id) == ["Beret", "Cap"]
+    assert len(board_queries()) == 2
+
+    # boards are served from memory until something marks them stale
+    products["Cap"].sold_count = 50
+    db_session.commit()
+    assert names(limit=1) == ["Clutch"]
+    assert len(board_queries()) == 2
+    leaderboards.invalidate()
+    assert names(limit=1) == ["Cap"]
+    # a catalog write marks boards stale; each is rebuilt on its own next request
+    catalog_version.bump()
+    assert names(category_id=hats.id) == ["Cap", "Beret"]
+    assert len(board_queries()) == 4
+
+    assert client.get("/recommendations/most-sold", params={"limit": 101}).status_code == 422
+
+
+def test_bought_together_index_build_save_reload_and_route(client, db_session, tmp_path, monkeypatch):
+    category = Category(name="Outfits")
+    db_session.add(category)
+    db_session.commit()
+    skirt, blouse, belt, scarf = (
+        Product(name=name, description="Test", price=10, rating=0, category_id=category.id, stock_count=5)
+        for name in ("Skirt", "Blouse", "Belt", "Scarf")
+    )
+    db_session.add_all([skirt, blouse, belt, scarf])
+    db_session.commit()
+
+    # skirt+blouse in three orders, skirt+belt in two, scarf alone
+    baskets = [[skirt, blouse], [skirt, blouse, belt], [skirt, blouse], [skirt, belt], [scarf]]
+    order_ids = np.array([i for i, basket in enumerate(baskets) for _ in basket])
+    product_ids = np.array([product.id for basket in baskets for product in basket])
+
+    index = build_index(order_ids, product_ids, top_k=5, score=CoOccurrenceScore.cosine, min_support=2)
+    assert index.lookup(skirt.id, 5) == [blouse.id, belt.id]
+    assert index.lookup(scarf.id, 5) == []
+
+    path = tmp_path / "bought_together.npz"
+    index.save(path)
+    holder = BoughtTogether(path, check_interval=0)
+    assert holder.lookup(skirt.id, 1) == [blouse.id]
+    monkeypatch.setattr(recommendation_service, "bought_together", holder)
+
+    response = client.get(f"/recommendations/bought-together/{skirt.id}")
+    assert response.status_code == 200
+    assert [product["name"] for product in response.json()] == ["Blouse", "Belt"]
+
+    # a rebuilt file replaces the old index on the next check
+    build_index(np.array([1, 1, 2, 2]), np.array([skirt.id, scarf.id] * 2), min_support=1).save(path)
+    os.utime(path, (1, 1))
+    response = client.get(f"/recommendations/bought-together/{skirt.id}")
+    assert [product["name"] for product in response.json()] == ["Scarf"]
+
+
+def test_similar_products_index_route_and_incremental_updates(client, auth_headers, db_session, tmp_path, monkeypatch):
+    dresses, shoes = Category(name="Summer dresses"), Category(name="Shoes")
+    db_session.add_all([dresses, shoes])
+    db_session.commit()
+    rows = [
+        ("Linen summer dress", "Light linen dress for hot days", dresses),
+        ("Silk summer dress", "Flowing silk dress", dresses),
+        ("Leather boots", "Warm leather boots for winter", shoes),
+        ("Leather sandals", "Open leather sandals", shoes),
+    ]
+    linen, silk, boots, sandals = products = [
+        Product(name=name, description=description, price=10, rating=0, category_id=category.id, stock_count=5)
+        for name, description, category in rows
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+
+    index = SimilarityIndex.build(
+        [ProductDocument.from_product(product) for product in products], top_k=3, max_features=100, block_size=2
+    )
+    norms = np.sqrt(np.add.reduceat(index.vectors.data**2, index.vectors.indptr[:-1]))
+    np.testing.assert_allclose(norms, 1, rtol=1e-5)
+    # sparse scores match the dense cosine they replace
+    dense = np.zeros((index.vectors.n_rows, index.vectors.n_columns), np.float32)
+    dense[np.repeat(np.arange(index.vectors.n_rows), np.diff(index.vectors.indptr)), index.vectors.indices] = (
+        index.vectors.data
+    )
+    np.testing.assert_allclose(index.similarities(index.vectors.row(0)), dense @ dense[0], rtol=1e-5)
+    assert index.neighbors[index.rows[linen.id]][0] == silk.id
+
+    # a relative directory, as in the default setting; the build being replaced is kept
+    monkeypatch.chdir(tmp_path)
+    first = index.save("similar")
+    second = index.save("similar")
+    assert first.is_dir() and second.is_dir()
+    assert (tmp_path / "similar" / "current").resolve() == second
+    index.save("similar")
+    assert not first.exists() and second.is_dir()
+
+    holder = SimilarProducts(tmp_path / "similar", top_k=3, check_interval=3600)
+    assert holder.reload()
+    assert isinstance(holder.index.vectors.data, np.memmap)
+    assert isinstance(holder.index.postings.indices, np.memmap)
+    monkeypatch.setattr(recommendation_service, "similar_products", holder)
+    monkeypatch.setattr(similar_products_module, "similar_products", holder)
+
+    response = client.get(f"/recommendations/similar/{boots.id}", params={"limit": 1})
+    assert response.status_code == 200
+    assert [product["name"] for product in response.json()] == ["Leather sandals"]
+
+    # created and edited products are folded in without a rebuild, after the response
+    admin = auth_headers("admin@example.com", is_admin=True)
+    boots_id, sandals_id, linen_id, shoes_id = boots.id, sandals.id, linen.id, shoes.id
+    new_boots = {"name": "Leather winter boots", "description": "Warm leather boots", "price": 10, "category_id": shoes_id}
+    wool = client.post("/products", json=new_boots, headers=admin).json()
+    assert holder.lookup(boots_id, 1) == [wool["id"]]
+    assert holder.lookup(wool["id"], 1) == [boots_id]
+    client.put(
+        f"/products/{sandals_id}",
+        json={"name": "Summer dress", "description": "Cotton dress", "category_id": dresses.id},
+        headers=admin,
+    )
+    assert sandals_id not in holder.lookup(boots_id, 3)
+    assert sandals_id in holder.lookup(linen_id, 3)
+
+    # bulk-imported products go through the same refresh
+    imported = client.post(
+        "/products/bulk-import",
+        params={"format": "ndjson"},
+        content=json.dumps(
+            {"name": "Leather ankle boots", "description": "Warm leather boots", "price": 10, "category_id": shoes_id}
+        ),
+        headers=admin,
+    )
+    assert imported.json()["created"] == 1
+    ankle_id = client.get("/products", params={"q": "ankle"}).json()[0]["id"]
+    assert ankle_id in holder.lookup(boots_id, 2)
+
+    # a broken index never fails the product write
+    def broken(doc):
+        raise ValueError("dimension mismatch")
+
+    monkeypatch.setattr(holder, "upsert", broken)
+    response = client.put(f"/products/{sandals_id}", json={"name": "Cotton dress"}, headers=admin)
+    assert response.status_code == 200
+
+
+def test_for_me_serves_built_recommendations_and_falls_back_to_most_sold(client, auth_headers, db_session):
+    category = Category(name="Knitwear")
+    db_session.add(category)
+    db_session.commit()
+    sweater, cardigan, scarf, gloves = products = [
+        Product(
+            name=name, description="Test", price=10, rating=0, category_id=category.id, stock_count=5, sold_count=sold
+        )
+        for name, sold in [("Sweater", 1), ("Cardigan", 2), ("Scarf", 3), ("Gloves", 9)]
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+
+    headers = {}
+    for email in ("alice@example.com", "bob@example.com"):
+        headers[email] = auth_headers(email)
+    alice = db_session.query(User).filter(User.email == "alice@example.com").one()
+
+    # other users pair sweater with cardigan (three times) and with scarf (twice)
+    history = [(100, sweater), (100, cardigan), (101, sweater), (101, cardigan), (102, sweater), (102, cardigan)]
+    history += [(103, sweater), (103, scarf), (104, sweater), (104, scarf), (alice.id, sweater)]
+    user_ids = np.array([user_id for user_id, _ in history])
+    product_ids = np.array([product.id for _, product in history])
+    index = item_neighbors(user_ids, product_ids, neighbors=10, min_support=2)
+    top = score_users(
+        user_ids, product_ids, index, top_n=5, seen_user_ids=np.array([alice.id]), seen_product_ids=np.array([scarf.id])
+    )
+    mine = top.user_ids == alice.id
+    assert top.product_ids[mine].tolist() == [cardigan.id]
+    # a user's own history is never recommended back
+    assert top.product_ids[top.user_ids == 100].tolist() == [scarf.id]
+
+    UserRecommendationRepository(db_session).replace_all(top.rows())
+    db_session.commit()
+
+    response = client.get("/recommendations/for-me", headers=headers["alice@example.com"])
+    assert response.status_code == 200
+    assert [product["name"] for product in response.json()] == ["Cardigan"]
+
+    response = client.get("/recommendations/for-me", params={"limit": 2}, headers=headers["bob@example.com"])
+    assert [product["name"] for product in response.json()] == ["Gloves", "Scarf"]
+    assert client.get("/recommendations/for-me").status_code == 401
+
+
+def test_trending_decays_old_activity_and_serves_windows(client, db_session, monkeypatch):
+    category = Category(name="Accessories")
+    db_session.add(category)
+    db_session.commit()
+    old, new = (
+        Product(name=name, description="Test", price=10, rating=0, category_id=category.id, stock_count=5)
+        for name in ("Old favourite", "New arrival")
+    )
+    db_session.add_all([old, new])
+    db_session.commit()
+
+    now = [1_000_000.0]
+    engine = Trending(size=10, view_weight=1, sale_weight=10, clock=lambda: now[0])
+    monkeypatch.setattr(recommendation_service, "trending", engine)
+    monkeypatch.setattr(product_service, "trending", engine)
+
+    for _ in range(30):
+        engine.record_view(old.id)
+    now[0] += 3 * 24 * 3600
+    engine.record_sales({new.id: 1})
+    for _ in range(2):
+        engine.record_view(new.id)
+
+    # three days on, 30 old views are worth e^-3 * 30 ~ 1.5 in the 24h window but ~19.5 over 7d
+    assert engine.top(TrendingWindow.day, 10) == [new.id, old.id]
+    assert engine.top(TrendingWindow.week, 10) == [old.id, new.id]
+
+    # viewing a product page records a view; an hour on, the new arrival's 12 are worth ~4.4
+    now[0] += 3600
+    for _ in range(6):
+        assert client.get(f"/products/{old.id}").status_code == 200
+    response = client.get("/recommendations/trending", params={"window": "1h", "limit": 1})
+    assert response.status_code == 200
+    assert [product["name"] for product in response.json()] == ["Old favourite"]
+    assert client.get("/recommendations/trending", params={"window": "2h"}).status_code == 422
+
+    # far in the future the scores are rebased instead of overflowing
+    now[0] += 365 * 24 * 3600
+    engine.record_view(new.id)
+    assert engine.top(TrendingWindow.hour, 1) == [new.id]
+    assert np.isfinite(engine.windows[TrendingWindow.hour].scores).all()
+
+
+def test_trending_top_stays_exact_when_full():
+    scores = DecayedScores(window_seconds=3600, size=2, landmark=0)
+    for product_id, weight in [(1, 5), (2, 3), (3, 1), (3, 1), (3, 2), (4, 1)]:
+        scores.add(product_id, weight, now=0)
+    assert scores.ranked(10) == [1, 3]